@@ -0,0 +1,108 @@
+import io
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+
+# 仪表盘先按倍数放大绘制再缩小，得到平滑的圆弧边缘
+GAUGE_SUPERSAMPLE = 3
+
+# GIF 差分帧中表示“沿用上一帧像素”的透明调色板索引，量化时不会占用
+TRANSPARENT_INDEX = 255
+
+
+def draw_gauge(size: int, value: float, color: str, bg_color: str,
+               font: ImageFont.FreeTypeFont, text_color: str = '#ffffff',
+               stroke_width: int = 0, stroke_color: Optional[str] = None) -> Image.Image:
+    """用 PIL 绘制与 matplotlib 饼图外观一致的占用率仪表盘，单帧耗时远低于 matplotlib。"""
+    big = size * GAUGE_SUPERSAMPLE
+    img = Image.new('RGBA', (big, big), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((0, 0, big - 1, big - 1), fill=bg_color)
+    value = max(0.0, min(100.0, value))
+    if value >= 100.0:
+        draw.ellipse((0, 0, big - 1, big - 1), fill=color)
+    elif value > 0:
+        # matplotlib 饼图从 12 点方向逆时针绘制
+        draw.pieslice((0, 0, big - 1, big - 1), start=-90 - 360 * value / 100, end=-90, fill=color)
+    img = img.resize((size, size), Image.Resampling.LANCZOS)
+
+    draw = ImageDraw.Draw(img)
+    text = f"{value:.1f}%"
+    bbox = draw.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+    draw.text(((size - (bbox[2] - bbox[0])) / 2 - bbox[0], (size - (bbox[3] - bbox[1])) / 2 - bbox[1]),
+              text, font=font, fill=text_color, stroke_width=stroke_width, stroke_fill=stroke_color)
+    return img
+
+
+def sparkline_points(values: Sequence[float], box: Tuple[int, int, int, int],
+                     lo: float = 0.0, hi: float = 100.0) -> List[Tuple[float, float]]:
+    x0, y0, x1, y1 = box
+    span = (hi - lo) or 1.0
+    step = (x1 - x0) / max(1, len(values) - 1)
+    points = []
+    for i, v in enumerate(values):
+        ratio = (min(hi, max(lo, v)) - lo) / span
+        points.append((x0 + i * step, y1 - ratio * (y1 - y0)))
+    return points
+
+
+def draw_sparkline(draw: ImageDraw.ImageDraw, points: Sequence[Tuple[float, float]], color: str,
+                   width: int = 2, dot_radius: int = 0):
+    if len(points) >= 2:
+        draw.line(list(points), fill=color, width=width, joint='curve')
+    if dot_radius and points:
+        x, y = points[-1]
+        draw.ellipse((x - dot_radius, y - dot_radius, x + dot_radius, y + dot_radius), fill=color)
+
+
+def quantize_frames(frames: Sequence[Image.Image], colors: int) -> List[Image.Image]:
+    """所有帧共用第一帧生成的调色板，保证帧间未变化区域的像素索引完全一致，便于差分压缩。"""
+    first = frames[0].convert('RGB')
+    palette = first.quantize(colors=min(colors, TRANSPARENT_INDEX), method=Image.Quantize.MEDIANCUT)
+    quantized = [palette]
+    for frame in frames[1:]:
+        quantized.append(frame.convert('RGB').quantize(palette=palette, dither=Image.Dither.NONE))
+    return quantized
+
+
+def diff_frames(frames: Sequence[Image.Image]) -> List[Image.Image]:
+    """把调色板帧中与上一帧相同的像素替换为透明索引，GIF 只需编码真正变化的像素。"""
+    result = [frames[0]]
+    for prev, cur in zip(frames, frames[1:]):
+        prev_idx = Image.frombytes('L', prev.size, prev.tobytes())
+        cur_idx = Image.frombytes('L', cur.size, cur.tobytes())
+        unchanged = ImageChops.difference(prev_idx, cur_idx).point(lambda v: 255 if v == 0 else 0)
+        frame = cur.copy()
+        frame.paste(TRANSPARENT_INDEX, mask=unchanged)
+        result.append(frame)
+    return result
+
+
+def encode_animation(frames: Sequence[Image.Image], fmt: str, duration: int, colors: int = 128,
+                     quality: int = 80) -> bytes:
+    frames = quantize_frames(frames, colors)
+    buffer = io.BytesIO()
+    if fmt == 'gif':
+        # disposal=1 保留上一帧，差分帧里透明的像素即沿用上一帧；编码器还会把每帧裁剪到变化区域
+        frames = diff_frames(frames)
+        frames[0].save(buffer, format='GIF', save_all=True, append_images=frames[1:],
+                       duration=duration, loop=0, disposal=1, optimize=False,
+                       transparency=TRANSPARENT_INDEX)
+    else:
+        # WebP 动画编码器同样只编码与上一帧不同的子矩形；调色板帧在无损模式下压缩率很高
+        frames[0].save(buffer, format='WEBP', save_all=True, append_images=frames[1:],
+                       duration=duration, loop=0, lossless=True, quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def value_at(history: Sequence[Tuple[float, float]], timestamp: float, default: Optional[float] = None):
+    """返回 ``timestamp`` 时刻之前最近一次的采样值（history 按时间升序）。"""
+    result = default
+    for ts, value in history:
+        if ts > timestamp:
+            if result is None:
+                result = value
+            break
+        result = value
+    return result
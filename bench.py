@@ -0,0 +1,388 @@
+"""VisiStat 性能基准脚本。
+
+在插件目录下运行（需要安装 AstrBot 及 requirements.txt 中的依赖）：
+
+    python bench.py render
+    python bench.py startup
+    python bench.py providers
+    python bench.py live
+    python bench.py modes
+    python bench.py themes
+    python bench.py procfs
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import timeit
+import types
+from pathlib import Path
+from statistics import median
+
+from PIL import Image, ImageFilter
+
+PLUGIN_DIR = Path(__file__).resolve().parent
+# 插件以包的形式被 AstrBot 加载（main.py 使用相对导入），这里同样按包导入
+sys.path.insert(0, str(PLUGIN_DIR.parent))
+
+BG_RESOLUTIONS = [(1074, 760), (1920, 1080), (2560, 1440), (3840, 2160)]
+
+SAMPLE_DATA = {
+    'cpu_percent': 37.5,
+    'mem_percent': 62.1,
+    'disk_percent': 48.9,
+    'temp_results': {'cpu_temp': 45.0, 'gpu_temp': 52.5, 'bat_temp': None, 'power_w': 128.0},
+    'bat_data': {'percent': None, 'status_text': '电池信息: N/A'},
+    'extra_lines': [],
+    'system_info': 'Linux 6.8.12-4-pve (x86_64)',
+    'uptime': '12天 3小时 25分',
+    'net_sent': 10240.55,
+    'net_recv': 20480.75,
+    'current_time': '2025-01-01 12:00:00',
+}
+
+
+def _import_main():
+    return importlib.import_module(f"{PLUGIN_DIR.name}.main")
+
+
+def _make_monitor(config: dict):
+    main = _import_main()
+    context = types.SimpleNamespace(logger=logging.getLogger("visistat.bench"))
+    return main.ServerMonitor(context, config)
+
+
+@contextlib.contextmanager
+def _isolated_cache():
+    """运行期间把背景模糊缓存重定向到临时目录，不读写插件目录中的 layout_cache.json 与 cached_blurred_*.png。
+
+    每次进入都是空目录，即冷缓存；也可作为装饰器使用。
+    """
+    main = _import_main()
+    saved = main.CACHE_DIR, main.CACHE_FILE
+    with tempfile.TemporaryDirectory(prefix="visistat-cache-") as tmp:
+        main.CACHE_DIR = Path(tmp)
+        main.CACHE_FILE = main.CACHE_DIR / "layout_cache.json"
+        try:
+            yield main.CACHE_DIR
+        finally:
+            main.CACHE_DIR, main.CACHE_FILE = saved
+
+
+def _timed(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return median(samples)
+
+
+def bench_render(args):
+    src = Image.open(str(PLUGIN_DIR / "resources" / "bg2.png")).convert("RGB")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'background':>11} {'max':>5} {'mode':>8} {'output':>10} {'setup':>9} {'render':>9} {'encode':>9} {'size':>9}")
+        for width, height in BG_RESOLUTIONS:
+            bg_path = Path(tmp) / f"bg_{width}x{height}.png"
+            src.resize((width, height), Image.Resampling.LANCZOS).filter(ImageFilter.DETAIL).save(str(bg_path))
+            for max_size in (0, args.max_output_size):
+                for mode in ("quality", "fast"):
+                    monitor = None
+
+                    def setup():
+                        nonlocal monitor
+                        monitor = _make_monitor({
+                            'background_config': {'image_path': str(bg_path), 'blur_radius': 10},
+                            'font_config': {'content_font_path': 'fonts/content.ttf'},
+                            'user_config': {'fixed_avatar_path': 'resources/avatar.png'},
+                            'render_config': {'max_output_size': max_size, 'resample_mode': mode},
+                        })
+                        monitor._prepare_assets_sync()
+                        monitor._assets_ready = True
+
+                    # 每组参数使用新的缓存目录，setup 计入冷缓存下的背景模糊耗时
+                    with _isolated_cache():
+                        setup_ms = _timed(setup, 1)
+                        avatar = monitor._load_avatar(monitor._avatar_limit())
+                        pic = monitor._draw_status_card(SAMPLE_DATA, avatar, 'bench')
+                        render_ms = _timed(lambda: monitor._draw_status_card(SAMPLE_DATA, avatar, 'bench'), args.repeat)
+
+                    buffer = io.BytesIO()
+
+                    def encode():
+                        buffer.seek(0)
+                        buffer.truncate()
+                        pic.convert("RGB").save(buffer, format="PNG", compress_level=monitor.png_compress_level)
+
+                    encode_ms = _timed(encode, args.repeat)
+                    print(f"{width:>5}x{height:<5} {max_size:>5} {mode:>8} {pic.size[0]:>4}x{pic.size[1]:<5} "
+                          f"{setup_ms:>7.1f}ms {render_ms:>7.1f}ms {encode_ms:>7.1f}ms {len(buffer.getvalue()) / 1024:>7.1f}KB")
+
+
+STARTUP_SCRIPT = textwrap.dedent("""
+    import asyncio, importlib, logging, pathlib, sys, time, types
+    sys.path.insert(0, {plugin_parent!r})
+    import astrbot.api.all, PIL.Image, psutil
+    start = time.perf_counter()
+    main = importlib.import_module({plugin_name!r} + ".main")
+    imported = time.perf_counter()
+    main.CACHE_DIR = pathlib.Path({cache_dir!r})
+    main.CACHE_FILE = main.CACHE_DIR / "layout_cache.json"
+    monitor = main.ServerMonitor(types.SimpleNamespace(logger=logging.getLogger("bench")), {config!r})
+    constructed = time.perf_counter()
+
+    async def run():
+        monitor.background_sampling = False
+        await monitor.initialize()
+        await monitor._asset_task
+
+    asyncio.run(run())
+    ready = time.perf_counter()
+    print((imported - start) * 1000, (constructed - imported) * 1000, (ready - constructed) * 1000)
+""")
+
+
+def bench_startup(args):
+    config = {
+        'background_config': {'image_path': 'resources/bg2.png', 'blur_radius': 10},
+        'font_config': {'content_font_path': 'fonts/content.ttf'},
+        'user_config': {'fixed_avatar_path': 'resources/avatar.png'},
+    }
+    print(f"{'run':>4} {'blur cache':>10} {'import':>9} {'init':>9} {'assets (background)':>20}")
+    with tempfile.TemporaryDirectory(prefix="visistat-cache-") as cache_dir:
+        script = STARTUP_SCRIPT.format(plugin_parent=str(PLUGIN_DIR.parent), plugin_name=PLUGIN_DIR.name,
+                                       cache_dir=cache_dir, config=config)
+        for run in range(args.repeat):
+            cold = run % 2 == 0
+            if cold:
+                for cached in Path(cache_dir).glob("cached_blurred_*"):
+                    cached.unlink()
+            output = subprocess.run([sys.executable, "-c", script], cwd=str(PLUGIN_DIR),
+                                    capture_output=True, text=True, check=True).stdout
+            import_ms, init_ms, ready_ms = (float(v) for v in output.split()[-3:])
+            print(f"{run:>4} {'cold' if cold else 'warm':>10} {import_ms:>7.1f}ms {init_ms:>7.1f}ms {ready_ms:>18.1f}ms")
+
+
+def bench_providers(args):
+    monitor = _make_monitor({'sensor_config': {'monitor_gpu_temp': True}})
+    registry = monitor.providers
+
+    async def run():
+        walls = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            await registry.refresh(force=True)
+            walls.append((time.perf_counter() - start) * 1000)
+        return median(walls)
+
+    wall_ms = asyncio.run(run())
+    print(f"{'provider':>14} {'enabled':>8} {'cost':>10} {'interval':>9} {'last':>9} {'avg':>9} {'timeouts':>9} {'errors':>7}")
+    serial_ms = 0.0
+    for provider in registry:
+        stats = provider.stats()
+        if provider.enabled and stats['avg_ms'] is not None:
+            serial_ms += stats['avg_ms']
+        last = f"{stats['last_ms']:.2f}ms" if stats['last_ms'] is not None else "-"
+        avg = f"{stats['avg_ms']:.2f}ms" if stats['avg_ms'] is not None else "-"
+        print(f"{provider.name:>14} {str(provider.enabled):>8} {stats['cost']:>10} {stats['interval']:>8}s "
+              f"{last:>9} {avg:>9} {stats['timeouts']:>9} {stats['errors']:>7}")
+    print(f"parallel refresh (median): {wall_ms:.2f}ms, sum of sample costs: {serial_ms:.2f}ms")
+
+
+@_isolated_cache()
+def bench_live(args):
+    print(f"{'format':>6} {'frames':>6} {'render':>9} {'fps':>7} {'encode':>9} {'size':>9} {'per frame':>10}")
+    for fmt in ("webp", "gif"):
+        monitor = _make_monitor({
+            'background_config': {'image_path': 'resources/bg2.png', 'blur_radius': 10},
+            'font_config': {'content_font_path': 'fonts/content.ttf'},
+            'live_config': {'format': fmt, 'frames': args.frames},
+        })
+        monitor._prepare_assets_sync()
+        now = time.time()
+        for name, series in (('cpu', lambda i: 50 + 40 * math.sin(i / 4)),
+                             ('memory', lambda i: 40 + i % 30),
+                             ('disk', lambda i: 48.9)):
+            for i in range(args.frames):
+                monitor.providers.get(name).history.append((now - 2 * (args.frames - i), series(i)))
+        samples = monitor._live_samples(args.frames)
+
+        start = time.perf_counter()
+        base, layout = monitor._draw_live_base(samples)
+        frames = list(monitor._iter_live_frames(base, layout, samples))
+        render_ms = (time.perf_counter() - start) * 1000
+        payload, frame_count, encode_ms = monitor._encode_live_frames(frames)
+        print(f"{fmt:>6} {frame_count:>6} {render_ms:>7.1f}ms {len(frames) / render_ms * 1000:>7.1f} "
+              f"{encode_ms:>7.1f}ms {len(payload) / 1024:>7.1f}KB {len(payload) / frame_count / 1024:>8.1f}KB")
+
+
+@_isolated_cache()
+def bench_modes(args):
+    monitor = _make_monitor({
+        'background_config': {'image_path': 'resources/bg2.png', 'blur_radius': 10},
+        'font_config': {'content_font_path': 'fonts/content.ttf'},
+        'user_config': {'fixed_avatar_path': 'resources/avatar.png'},
+    })
+    monitor._prepare_assets_sync()
+    monitor._assets_ready = True
+    avatar = monitor._load_avatar(monitor._avatar_limit())
+
+    print(f"{'mode':>8} {'latency':>9} {'payload':>9}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 渲染结果写在当前目录，切换到临时目录避免覆盖插件目录下的图片
+        os.chdir(tmp)
+        try:
+            cases = [
+                ('full', lambda: monitor._render_card_file(SAMPLE_DATA, avatar, 'bench')),
+                ('compact', lambda: monitor._render_compact_file(SAMPLE_DATA)),
+                ('text', lambda: monitor._build_text_summary(SAMPLE_DATA)),
+            ]
+            for mode, func in cases:
+                result = func()
+                latency_ms = _timed(func, args.repeat)
+                if mode == 'text':
+                    size = len(result.encode('utf-8'))
+                else:
+                    size = os.path.getsize(result)
+                print(f"{mode:>8} {latency_ms:>7.1f}ms {size / 1024:>7.1f}KB")
+        finally:
+            os.chdir(cwd)
+
+
+@_isolated_cache()
+def bench_themes(args):
+    monitor = _make_monitor({
+        'background_config': {'image_path': 'resources/bg2.png', 'blur_radius': 10},
+        'font_config': {'content_font_path': 'fonts/content.ttf'},
+        'user_config': {'fixed_avatar_path': 'resources/avatar.png'},
+    })
+    monitor._prepare_assets_sync()
+    monitor._assets_ready = True
+    avatar = monitor._load_avatar(monitor._avatar_limit())
+
+    print(f"{'theme':>10} {'output':>10} {'compile':>9} {'render':>9}")
+    render_ms = _timed(lambda: monitor._draw_status_card(SAMPLE_DATA, avatar, 'bench'), args.repeat)
+    print(f"{'classic':>10} {monitor.card_size[0]:>4}x{monitor.card_size[1]:<5} {'-':>9} {render_ms:>7.1f}ms")
+    for theme_id in monitor.themes.names():
+        # 首次取用时编译，之后的请求直接复用缓存的渲染计划
+        compile_ms = _timed(lambda: monitor.themes.get(theme_id), 1)
+        plan = monitor.themes.get(theme_id)
+        render_ms = _timed(lambda: monitor._draw_themed_card(theme_id, SAMPLE_DATA, avatar, 'bench'), args.repeat)
+        print(f"{theme_id:>10} {plan.size[0]:>4}x{plan.size[1]:<5} {compile_ms:>7.1f}ms {render_ms:>7.1f}ms")
+
+
+# 与 main.ARCSTATS_PATH 相同；这里不导入 main，procfs 基准不需要 AstrBot 环境
+ARCSTATS_PATH = "/proc/spl/kstat/zfs/arcstats"
+
+ARCSTATS_FIXTURE_KEYS = [
+    'hits', 'iohits', 'misses', 'demand_data_hits', 'demand_data_iohits', 'demand_data_misses',
+    'demand_metadata_hits', 'demand_metadata_misses', 'prefetch_data_hits', 'prefetch_data_misses',
+    'mru_hits', 'mru_ghost_hits', 'mfu_hits', 'mfu_ghost_hits', 'deleted', 'mutex_miss', 'access_skip',
+    'evict_skip', 'evict_not_enough', 'evict_l2_cached', 'evict_l2_eligible', 'hash_elements',
+    'hash_elements_max', 'hash_collisions', 'hash_chains', 'hash_chain_max', 'meta', 'pd', 'pm',
+    'c', 'c_min', 'c_max', 'size', 'compressed_size', 'uncompressed_size', 'overhead_size', 'hdr_size',
+    'data_size', 'metadata_size', 'dbuf_size', 'dnode_size', 'bonus_size', 'anon_size', 'mru_size',
+    'mfu_size', 'l2_hits', 'l2_misses', 'l2_size', 'memory_throttle_count', 'memory_direct_count',
+    'memory_indirect_count', 'memory_all_bytes', 'memory_free_bytes', 'memory_available_bytes',
+    'arc_no_grow', 'arc_tempreserve', 'arc_loaned_bytes', 'arc_prune', 'arc_meta_used', 'arc_dnode_limit',
+]
+
+
+def _split_parse(path: str, keys, value_index: int):
+    with open(path, 'r') as f:
+        table = {}
+        for line in f.read().splitlines():
+            parts = line.split()
+            if len(parts) > value_index + 1:
+                table[parts[0].rstrip(':')] = parts[value_index + 1]
+    return {key: int(table[key]) if key in table else None for key in keys}
+
+
+def _last_key(path: str):
+    # 超过一页的 /proc 文件要多次 read() 才能读到最后一行，用它检查读取器是否读完了整个文件
+    try:
+        with open(path, 'r') as f:
+            return f.read().rstrip('\n').rsplit('\n', 1)[-1].split()[0].rstrip(':')
+    except (OSError, IndexError):
+        return None
+
+
+def bench_procfs(args):
+    procfs = importlib.import_module(f"{PLUGIN_DIR.name}.procfs")
+    with tempfile.TemporaryDirectory() as tmp:
+        arcstats = Path(tmp) / "arcstats"
+        lines = ["13 1 0x01 123 33456 7166549741 1253468349207934", "name                            type data"]
+        lines += [f"{key:<32}4    {1000000007 * (i + 1)}" for i, key in enumerate(ARCSTATS_FIXTURE_KEYS)]
+        arcstats.write_text("\n".join(lines) + "\n")
+
+        cases = [
+            ('/proc/meminfo', ['MemTotal', 'MemAvailable', 'SwapTotal', 'SwapFree',
+                               'HugePages_Total', 'HugePages_Free', 'Hugepagesize'], 0),
+            ('/proc/vmstat', ['pswpin', 'pswpout', _last_key('/proc/vmstat')], 0),
+            (str(arcstats), ['size', 'c_max', 'hits', 'misses'], 1),
+            (ARCSTATS_PATH, ['size', 'c_max', 'hits', 'misses', _last_key(ARCSTATS_PATH)], 1),
+        ]
+        print(f"{'file':>16} {'keys':>5} {'KeyValueReader':>15} {'read().split()':>15} {'speedup':>8}")
+        for path, keys, value_index in cases:
+            if not os.path.exists(path):
+                continue
+            keys = [key for key in keys if key]
+            reader = procfs.KeyValueReader(path, keys, value_index=value_index)
+            assert reader.read() == _split_parse(path, keys, value_index)
+            reader_us = timeit.timeit(reader.read, number=args.number) / args.number * 1e6
+            split_us = timeit.timeit(lambda: _split_parse(path, keys, value_index), number=args.number) / args.number * 1e6
+            name = os.path.basename(path)
+            print(f"{name:>16} {len(keys):>5} {reader_us:>13.1f}us {split_us:>13.1f}us {split_us / reader_us:>7.1f}x")
+            reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VisiStat benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    render = sub.add_parser("render", help="不同背景分辨率下的渲染/编码耗时与图片大小")
+    render.add_argument("--repeat", type=int, default=5)
+    render.add_argument("--max-output-size", type=int, default=1280)
+    render.set_defaults(func=bench_render)
+
+    startup = sub.add_parser("startup", help="插件导入、构造以及后台资源准备耗时")
+    startup.add_argument("--repeat", type=int, default=4)
+    startup.set_defaults(func=bench_startup)
+
+    providers = sub.add_parser("providers", help="各数据源的采样耗时以及并行刷新耗时")
+    providers.add_argument("--repeat", type=int, default=10)
+    providers.set_defaults(func=bench_providers)
+
+    live = sub.add_parser("live", help="动态卡片逐帧渲染速度与每帧体积")
+    live.add_argument("--frames", type=int, default=30)
+    live.set_defaults(func=bench_live)
+
+    modes = sub.add_parser("modes", help="完整卡片、精简卡片与文字摘要三种渲染模式的耗时与体积")
+    modes.add_argument("--repeat", type=int, default=5)
+    modes.set_defaults(func=bench_modes)
+
+    themes = sub.add_parser("themes", help="各主题的编译耗时与使用缓存渲染计划时的渲染耗时")
+    themes.add_argument("--repeat", type=int, default=5)
+    themes.set_defaults(func=bench_themes)
+
+    procfs = sub.add_parser("procfs", help="KeyValueReader 与 read().split() 解析 /proc 文件的耗时对比")
+    procfs.add_argument("--number", type=int, default=5000)
+    procfs.set_defaults(func=bench_procfs)
+
+    args = parser.parse_args()
+    logging.getLogger("matplotlib").setLevel(logging.ERROR)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# 只统计整块磁盘：排除分区、loop/ram 等虚拟设备
+_EXCLUDED_DEVICE_RE = re.compile(
+    r'^(loop|ram|zram|sr|fd|md\d+p)\w*$'
+    r'|^(sd|vd|xvd|hd)[a-z]+\d+$'
+    r'|^(nvme\d+n\d+|mmcblk\d+|zd\d+)p\d+$'
+)
+
+_NVME_FIELDS = {
+    'temperature': re.compile(r'^Temperature:\s*(-?\d+)\s*Celsius', re.MULTILINE),
+    'percentage_used': re.compile(r'^Percentage Used:\s*(\d+)%', re.MULTILINE),
+    'media_errors': re.compile(r'^Media and Data Integrity Errors:\s*([\d,]+)', re.MULTILINE),
+}
+
+_ATA_ATTRIBUTE_RE = re.compile(
+    r'^\s*(\d+)\s+(\S+)\s+0x[0-9a-fA-F]+\s+(\d+)\s+(\d+)\s+(\S+)\s+\S+\s+\S+\s+\S+\s+(\d+)',
+    re.MULTILINE,
+)
+
+# ATA 属性中表示寿命剩余百分比（VALUE 列）的 ID，按优先级排列
+_ATA_LIFE_LEFT_IDS = (231, 202, 177, 233)
+_ATA_TEMPERATURE_IDS = (194, 190)
+_ATA_MEDIA_ERROR_IDS = (5, 197, 198)
+
+
+def is_whole_disk(name: str) -> bool:
+    return not _EXCLUDED_DEVICE_RE.match(name)
+
+
+def compute_disk_rates(prev: Dict[str, Any], curr: Dict[str, Any], elapsed: float,
+                       devices: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, float]]:
+    """根据两次 ``psutil.disk_io_counters(perdisk=True)`` 的差值计算每块磁盘的速率。
+
+    返回 ``{设备: {'read_mb_s', 'write_mb_s', 'iops', 'await_ms'}}``，await 为该时间段内每次 IO 的平均耗时。
+    """
+    if elapsed <= 0:
+        return {}
+    wanted = set(devices) if devices else None
+    rates = {}
+    for name, now in curr.items():
+        if wanted is not None:
+            if name not in wanted:
+                continue
+        elif not is_whole_disk(name):
+            continue
+        before = prev.get(name)
+        if before is None:
+            continue
+
+        reads = now.read_count - before.read_count
+        writes = now.write_count - before.write_count
+        read_bytes = now.read_bytes - before.read_bytes
+        write_bytes = now.write_bytes - before.write_bytes
+        # 计数器回绕或设备重置时跳过本次
+        if min(reads, writes, read_bytes, write_bytes) < 0:
+            continue
+
+        ops = reads + writes
+        busy_ms = (now.read_time - before.read_time) + (now.write_time - before.write_time)
+        rates[name] = {
+            'read_mb_s': read_bytes / elapsed / (1024 * 1024),
+            'write_mb_s': write_bytes / elapsed / (1024 * 1024),
+            'iops': ops / elapsed,
+            'await_ms': busy_ms / ops if ops > 0 else 0.0,
+        }
+    return rates
+
+
+def _to_int(text: str) -> int:
+    return int(text.replace(',', ''))
+
+
+def parse_smartctl_nvme(output: str) -> Dict[str, Optional[int]]:
+    health = {'temperature': None, 'percentage_used': None, 'media_errors': None}
+    for key, pattern in _NVME_FIELDS.items():
+        m = pattern.search(output)
+        if m:
+            health[key] = _to_int(m.group(1))
+    return health
+
+
+def parse_smartctl_ata(output: str) -> Dict[str, Optional[int]]:
+    health = {'temperature': None, 'percentage_used': None, 'media_errors': None}
+    attributes = {}
+    for m in _ATA_ATTRIBUTE_RE.finditer(output):
+        attributes[int(m.group(1))] = (int(m.group(3)), int(m.group(6)))
+
+    for attr_id in _ATA_TEMPERATURE_IDS:
+        if attr_id in attributes:
+            health['temperature'] = attributes[attr_id][1]
+            break
+    for attr_id in _ATA_LIFE_LEFT_IDS:
+        if attr_id in attributes:
+            health['percentage_used'] = max(0, 100 - attributes[attr_id][0])
+            break
+    errors = [attributes[i][1] for i in _ATA_MEDIA_ERROR_IDS if i in attributes]
+    if errors:
+        health['media_errors'] = sum(errors)
+    return health
+
+
+def parse_smartctl(output: str) -> Dict[str, Optional[int]]:
+    if 'SMART/Health Information (NVMe' in output or 'Percentage Used:' in output:
+        return parse_smartctl_nvme(output)
+    return parse_smartctl_ata(output)
+
+
+def read_nvme_sysfs_temperature(controller: str, sysfs_root: str = '/sys') -> Optional[float]:
+    patterns = [
+        os.path.join(sysfs_root, 'class', 'nvme', controller, 'hwmon*', 'temp1_input'),
+        os.path.join(sysfs_root, 'class', 'nvme', controller, 'device', 'hwmon', 'hwmon*', 'temp1_input'),
+    ]
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            try:
+                with open(path, 'r') as f:
+                    return int(f.read().strip()) / 1000.0
+            except (OSError, ValueError):
+                continue
+    return None
+
+
+def list_smart_devices(sysfs_root: str = '/sys', devices: Optional[Iterable[str]] = None) -> List[str]:
+    """返回可查询 SMART 的设备名：NVMe 控制器（nvme0）以及 SATA/SAS 磁盘（sda）。"""
+    names = [os.path.basename(p) for p in glob.glob(os.path.join(sysfs_root, 'class', 'nvme', 'nvme*'))]
+    names += [os.path.basename(p) for p in glob.glob(os.path.join(sysfs_root, 'block', 'sd*'))]
+    if devices:
+        wanted = set(devices)
+        # 允许用 nvme0n1 这样的块设备名来指定控制器
+        names = [n for n in names if n in wanted or any(w.startswith(n + 'n') for w in wanted)]
+    return sorted(names)
+
+
+def run_smartctl(device: str, timeout: float = 10.0) -> Optional[str]:
+    smartctl = shutil.which('smartctl')
+    if smartctl is None:
+        return None
+    try:
+        result = subprocess.run([smartctl, '-A', f'/dev/{device}'], capture_output=True,
+                                text=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # smartctl 的退出码是位掩码，仅低两位表示命令本身失败
+    if result.returncode & 0b11:
+        return None
+    return result.stdout
+
+
+def read_smart_health(device: str, sysfs_root: str = '/sys', timeout: float = 10.0) -> Dict[str, Any]:
+    health = {'temperature': None, 'percentage_used': None, 'media_errors': None, 'source': None}
+    output = run_smartctl(device, timeout)
+    if output:
+        health.update(parse_smartctl(output))
+        health['source'] = 'smartctl'
+    if health['temperature'] is None and device.startswith('nvme'):
+        temperature = read_nvme_sysfs_temperature(device, sysfs_root)
+        if temperature is not None:
+            health['temperature'] = temperature
+            health['source'] = health['source'] or 'sysfs'
+    return health
@@ -0,0 +1,107 @@
+"""disk_health.py 解析逻辑的回归检查脚本。
+
+使用 fixtures/disk_health/ 下采集的真实格式输出（NVMe 与 ATA 磁盘的 ``smartctl -A``、
+间隔 10 秒的两份 ``/proc/diskstats``）运行解析函数，并与预期结果比较。在插件目录下运行：
+
+    python disk_health_check.py
+
+修改 disk_health.py 中的正则或速率计算后运行该脚本，有任何结果不一致时以非零状态退出。
+"""
+import collections
+import importlib
+import math
+import sys
+
+from bench import PLUGIN_DIR
+
+FIXTURE_DIR = PLUGIN_DIR / "fixtures" / "disk_health"
+
+# 两份 diskstats 的采集间隔（秒）
+DISKSTATS_INTERVAL = 10.0
+SECTOR_SIZE = 512
+
+# 与 psutil.disk_io_counters(perdisk=True) 返回值的字段一致
+DiskIO = collections.namedtuple(
+    "DiskIO", ["read_count", "write_count", "read_bytes", "write_bytes", "read_time", "write_time"])
+
+EXPECTED_SMART = {
+    'smartctl_nvme.txt': {'temperature': 41, 'percentage_used': 3, 'media_errors': 1024},
+    # 温度取 194 而不是 190；寿命取 177 的 VALUE（100 - 92）；介质错误为 5/197/198 的 RAW 之和
+    'smartctl_ata.txt': {'temperature': 36, 'percentage_used': 8, 'media_errors': 3},
+}
+
+EXPECTED_RATES = {
+    'sda': {'read_mb_s': 2.0, 'write_mb_s': 5.0, 'iops': 200.0, 'await_ms': 3.0},
+    'nvme0n1': {'read_mb_s': 20.0, 'write_mb_s': 10.0, 'iops': 500.0, 'await_ms': 0.2},
+    'zd0': {'read_mb_s': 0.1, 'write_mb_s': 0.3, 'iops': 40.0, 'await_ms': 3.0},
+    'dm-0': {'read_mb_s': 0.0, 'write_mb_s': 0.0, 'iops': 0.0, 'await_ms': 0.0},
+}
+
+EXPECTED_WHOLE_DISK = {
+    'sda': True, 'sda1': False, 'vdb12': False,
+    'nvme0n1': True, 'nvme0n1p1': False, 'mmcblk0': True, 'mmcblk0p2': False,
+    'zd0': True, 'zd16': True, 'zd0p1': False, 'zd16p9': False,
+    'loop0': False, 'ram1': False, 'zram0': False, 'sr0': False,
+    'dm-0': True, 'md0': True, 'md0p1': False,
+}
+
+
+def load_diskstats(path) -> dict:
+    """把 /proc/diskstats 格式的文件解析为 ``{设备: DiskIO}``，单位与 psutil 相同（字节、毫秒）。"""
+    counters = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            name = fields[2]
+            reads, _, read_sectors, read_time, writes, _, write_sectors, write_time = map(int, fields[3:11])
+            counters[name] = DiskIO(reads, writes, read_sectors * SECTOR_SIZE, write_sectors * SECTOR_SIZE,
+                                    read_time, write_time)
+    return counters
+
+
+def _check(failures: list, label: str, actual, expected):
+    if isinstance(expected, float):
+        ok = actual is not None and math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+    else:
+        ok = actual == expected
+    print(f"{'ok' if ok else 'FAIL':<5} {label:<32} {actual!r:>10}  预期 {expected!r}")
+    if not ok:
+        failures.append(label)
+
+
+def main():
+    disk_health = importlib.import_module(f"{PLUGIN_DIR.name}.disk_health")
+    failures = []
+
+    for fixture, expected in EXPECTED_SMART.items():
+        output = (FIXTURE_DIR / fixture).read_text(encoding='utf-8')
+        health = disk_health.parse_smartctl(output)
+        for key, value in expected.items():
+            _check(failures, f"{fixture} {key}", health[key], value)
+
+    before = load_diskstats(FIXTURE_DIR / "diskstats_before.txt")
+    after = load_diskstats(FIXTURE_DIR / "diskstats_after.txt")
+    rates = disk_health.compute_disk_rates(before, after, DISKSTATS_INTERVAL)
+    _check(failures, "compute_disk_rates devices", sorted(rates), sorted(EXPECTED_RATES))
+    for device, expected in EXPECTED_RATES.items():
+        for key, value in expected.items():
+            _check(failures, f"{device} {key}", rates.get(device, {}).get(key), value)
+
+    # 显式指定设备时不再按整块磁盘过滤
+    selected = disk_health.compute_disk_rates(before, after, DISKSTATS_INTERVAL, devices=['sda1', 'loop0'])
+    _check(failures, "compute_disk_rates devices=", sorted(selected), ['loop0', 'sda1'])
+
+    for name, expected in EXPECTED_WHOLE_DISK.items():
+        _check(failures, f"is_whole_disk({name})", disk_health.is_whole_disk(name), expected)
+
+    if failures:
+        print(f"\n{len(failures)} 项检查未通过")
+        return 1
+    print("\n所有检查通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""VisiStat 状态卡片的基准图（golden image）回归检查脚本。
+
+使用固定的数据、字体（fonts/content.ttf）、头像与内置背景（bg1.png 竖屏 / bg2.png 横屏）渲染两种布局，
+与 golden/ 目录下保存的基准图逐像素比较，同时记录每个用例的渲染耗时。在插件目录下运行：
+
+    python golden.py check    # 与基准图比较，差异超出容差时以非零状态退出
+    python golden.py update   # 重新生成基准图并记录渲染耗时
+
+修改布局或饼图绘制代码后先运行 check：像素差异在容差内且耗时不高于基准，才说明改动没有影响画面。
+"""
+import argparse
+import copy
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageFilter
+
+from bench import PLUGIN_DIR, SAMPLE_DATA, _isolated_cache, _make_monitor, _timed
+
+GOLDEN_DIR = PLUGIN_DIR / "golden"
+MANIFEST_FILE = GOLDEN_DIR / "manifest.json"
+
+GOLDEN_USER_NAME = "VisiStat"
+
+GOLDEN_DATA = copy.deepcopy(SAMPLE_DATA)
+GOLDEN_DATA.update({
+    'bat_data': {'percent': 87.0, 'status_text': '电池状态: 充电中 (87.0%)'},
+    'extra_lines': ['温度 1h: CPU 41.0~52.5°C(均45.3)', '用电: 今日 1.52kWh 本周 9.87kWh 本月 31.40kWh'],
+})
+
+CASES = {
+    'vertical_bg1': {'image_path': 'resources/bg1.png'},
+    'horizontal_bg2': {'image_path': 'resources/bg2.png'},
+}
+
+# 先做轻微模糊再比较，抗锯齿与字体栅格化带来的亚像素偏移不会被判为差异
+DIFF_BLUR_RADIUS = 1
+# 模糊后亮度差超过该值的像素计为差异像素
+DIFF_THRESHOLD = 24
+
+
+def _render_case(case: str, repeat: int):
+    # 每个用例从空的模糊缓存开始，缓存写在临时目录，不影响插件目录中运行时使用的缓存
+    with _isolated_cache():
+        monitor = _make_monitor({
+            'custom_name': 'Linux 6.8.12-4-pve (x86_64)',
+            'background_config': {'image_path': CASES[case]['image_path'], 'blur_radius': 10},
+            'font_config': {'content_font_path': 'fonts/content.ttf'},
+            'user_config': {'fixed_avatar_path': 'resources/avatar.png', 'fixed_user_name': GOLDEN_USER_NAME},
+            'sensor_config': {'monitor_cpu_temp': True, 'monitor_gpu_temp': True, 'monitor_battery_status': True},
+        })
+        monitor._prepare_assets_sync()
+        monitor._assets_ready = True
+        avatar = monitor._load_avatar(monitor._avatar_limit())
+
+        pic = monitor._draw_status_card(GOLDEN_DATA, avatar, GOLDEN_USER_NAME).convert("RGB")
+        render_ms = _timed(lambda: monitor._draw_status_card(GOLDEN_DATA, avatar, GOLDEN_USER_NAME), repeat)
+    return pic, render_ms
+
+
+def _chart_environment():
+    """饼图文字由 matplotlib 绘制，记录其版本以及实际使用的字体文件，字体回退或版本变化时可以从清单中看出。"""
+    import matplotlib
+    from matplotlib import font_manager
+    props = font_manager.FontProperties(family=matplotlib.rcParams['font.family'], weight='bold')
+    return {'matplotlib': matplotlib.__version__, 'chart_font': Path(font_manager.findfont(props)).name}
+
+
+def compare_images(actual: Image.Image, expected: Image.Image):
+    """返回 (差异像素比例, 最大亮度差, 差异掩码)；尺寸不同时返回 None。"""
+    if actual.size != expected.size:
+        return None
+    blur = ImageFilter.GaussianBlur(DIFF_BLUR_RADIUS)
+    diff = ImageChops.difference(actual.convert("RGB").filter(blur), expected.convert("RGB").filter(blur)).convert("L")
+    histogram = diff.histogram()
+    changed = sum(histogram[DIFF_THRESHOLD + 1:])
+    max_diff = max((v for v, count in enumerate(histogram) if count), default=0)
+    mask = diff.point(lambda v: 255 if v > DIFF_THRESHOLD else 0)
+    return changed / (actual.size[0] * actual.size[1]), max_diff, mask
+
+
+def _diff_visual(actual: Image.Image, mask: Image.Image) -> Image.Image:
+    # 暗化实际渲染结果，再用红色标出差异像素
+    visual = Image.blend(actual.convert("RGB"), Image.new("RGB", actual.size, "#000000"), 0.6)
+    visual.paste(Image.new("RGB", actual.size, "#ff0000"), mask=mask)
+    return visual
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def golden_update(args):
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    manifest = {}
+    for case in args.cases or CASES:
+        pic, render_ms = _render_case(case, args.repeat)
+        pic.save(str(GOLDEN_DIR / f"{case}.png"), optimize=True)
+        manifest[case] = {'size': list(pic.size), 'render_ms': round(render_ms, 1)}
+        print(f"{case:<16} {pic.size[0]:>4}x{pic.size[1]:<5} {render_ms:>7.1f}ms")
+    old = _load_manifest()
+    old.update(manifest)
+    old['environment'] = _chart_environment()
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(old, f, indent=4, ensure_ascii=False)
+        f.write("\n")
+    return 0
+
+
+def golden_check(args):
+    manifest = _load_manifest()
+    output_dir = Path(args.output) if args.output else None
+    failed = []
+    print(f"{'case':<16} {'output':>10} {'changed':>9} {'max':>4} {'render':>9} {'golden':>9} {'delta':>7}")
+    for case in args.cases or CASES:
+        golden_path = GOLDEN_DIR / f"{case}.png"
+        if not golden_path.exists():
+            print(f"{case:<16} 缺少基准图，请先运行 python golden.py update")
+            failed.append(case)
+            continue
+
+        pic, render_ms = _render_case(case, args.repeat)
+        with Image.open(str(golden_path)) as expected:
+            result = compare_images(pic, expected)
+            expected_size = expected.size
+
+        golden_ms = manifest.get(case, {}).get('render_ms')
+        timing = f"{render_ms:>7.1f}ms"
+        if golden_ms:
+            timing += f" {golden_ms:>7.1f}ms {(render_ms / golden_ms - 1) * 100:>+6.1f}%"
+
+        if result is None:
+            print(f"{case:<16} 尺寸不一致: {pic.size[0]}x{pic.size[1]}，基准为 {expected_size[0]}x{expected_size[1]}")
+            failed.append(case)
+            continue
+
+        ratio, max_diff, mask = result
+        print(f"{case:<16} {pic.size[0]:>4}x{pic.size[1]:<5} {ratio * 100:>8.3f}% {max_diff:>4} {timing}")
+        if ratio > args.tolerance:
+            if output_dir is None:
+                output_dir = Path(tempfile.mkdtemp(prefix="visistat-golden-"))
+            output_dir.mkdir(parents=True, exist_ok=True)
+            pic.save(str(output_dir / f"{case}_actual.png"))
+            _diff_visual(pic, mask).save(str(output_dir / f"{case}_diff.png"))
+            failed.append(case)
+
+    recorded = manifest.get('environment')
+    current = _chart_environment()
+    if recorded and recorded != current:
+        print(f"\n注意: 基准图生成时的饼图环境为 {recorded}，当前为 {current}")
+
+    if failed:
+        print(f"\n{len(failed)} 个用例与基准图不一致: {', '.join(failed)}")
+        if output_dir is not None:
+            print(f"实际渲染结果与差异图已保存到 {output_dir}")
+        return 1
+    print("\n所有用例与基准图一致")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VisiStat golden image checks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    check = sub.add_parser("check", help="渲染所有用例并与基准图比较")
+    check.add_argument("cases", nargs="*", help=f"只检查指定用例（{', '.join(CASES)}）")
+    check.add_argument("--repeat", type=int, default=5, help="计时的渲染次数（取中位数）")
+    check.add_argument("--tolerance", type=float, default=0.0001, help="允许的差异像素比例")
+    check.add_argument("--output", help="保存差异图的目录，默认使用临时目录")
+    check.set_defaults(func=golden_check)
+
+    update = sub.add_parser("update", help="重新生成基准图")
+    update.add_argument("cases", nargs="*", help="只更新指定用例")
+    update.add_argument("--repeat", type=int, default=5)
+    update.set_defaults(func=golden_update)
+
+    args = parser.parse_args()
+    unknown = [case for case in args.cases if case not in CASES]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+    logging.getLogger("matplotlib").setLevel(logging.ERROR)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from astrbot.api.event.filter import command
-from astrbot.api.star import Context, Star, register
+from astrbot.api.star import Context, Star, StarTools, register
 from astrbot.api.all import *
 import psutil
 import platform
@@ -8,25 +8,123 @@ import asyncio
 import os
 import re
 from typing import Optional, Dict, Any, Tuple, List
-import matplotlib.pyplot as plt
 import io
 import base64
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageOps
 from pathlib import Path
 import json
-
-
-try:
-    if platform.system() == "Windows":
-        import wmi
-    else:
-        wmi = None
-except ImportError:
-    wmi = None
+import time
+import threading
+import math
+import shutil
+
+from .providers import MetricProvider, ProviderRegistry, COST_CHEAP, COST_MODERATE, COST_EXPENSIVE
+from .disk_health import compute_disk_rates, list_smart_devices, read_smart_health
+from .animation import draw_gauge, draw_sparkline, sparkline_points, encode_animation, value_at
+from .procfs import KeyValueReader, read_pressure, read_ksm, read_amdgpu
+from .ratelimit import RateLimiter, SCOPE_USER, SCOPE_GROUP, SCOPE_GLOBAL
+from .trends import RollingStats, EnergyMeter, parse_duration, load_checkpoint, save_checkpoint
+from .themes import ThemeRegistry, ThemeError, BUILTIN_THEME, render_plan
+
+
+# matplotlib 与 wmi 导入较慢（matplotlib 首次导入还会构建字体缓存），延迟到首次使用时再导入
+plt = None
+wmi = None
+_wmi_checked = False
+# 已注册到 matplotlib 的字体文件；matplotlib 只认识注册过的字体族名，未注册时会回退到系统字体
+_chart_font_files = set()
+
+
+def _get_pyplot():
+    global plt
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+    return plt
+
+
+def _register_chart_font(font_file: str):
+    if font_file and font_file not in _chart_font_files:
+        from matplotlib import font_manager
+        font_manager.fontManager.addfont(font_file)
+        _chart_font_files.add(font_file)
+
+
+def _get_wmi():
+    global wmi, _wmi_checked
+    if not _wmi_checked:
+        _wmi_checked = True
+        if platform.system() == "Windows":
+            try:
+                import wmi as wmi_module
+                wmi = wmi_module
+            except ImportError:
+                wmi = None
+    return wmi
 
 
 PLUGIN_DIR = Path(__file__).parent
-CACHE_FILE = PLUGIN_DIR / "layout_cache.json"
+# 背景模糊缓存（layout_cache.json 与 cached_blurred_*.png）所在目录
+CACHE_DIR = PLUGIN_DIR
+CACHE_FILE = CACHE_DIR / "layout_cache.json"
+# 与 metadata.yaml 中的 name 一致，用于定位 AstrBot 的插件数据目录
+PLUGIN_NAME = "astrbot_plugin_VisiStat"
+# 用户数据保存在插件数据目录（data/plugin_data/<插件名>），插件更新或重装时会替换插件目录，但不会清除这里的文件
+TRENDS_FILE_NAME = "trends_checkpoint.json"
+TRENDS_CHECKPOINT_VERSION = 1
+THEME_SELECTION_FILE_NAME = "theme_selection.json"
+
+# 加载头像时缩放到的最小边长；卡片更大时按布局中头像的实际尺寸放宽
+AVATAR_MIN_SIZE = 300
+
+TEMP_KEYS = (('cpu_temp', 'CPU'), ('gpu_temp', 'GPU'), ('bat_temp', 'BAT'))
+
+# 由布局直接绘制的内置数据源，其余数据源的格式化结果作为附加行显示在卡片上
+BUILTIN_PROVIDERS = ('cpu', 'memory', 'disk', 'net', 'hwmon', 'external_file', 'battery', 'wmi')
+
+THROTTLE_SCOPE_NAMES = {
+    SCOPE_USER: '个人限流',
+    SCOPE_GROUP: '群组限流',
+    SCOPE_GLOBAL: '全局限流',
+}
+
+RENDER_MODES = ('full', 'compact', 'text')
+RENDER_MODE_ALIASES = {
+    '完整': 'full', '精简': 'compact', '文字': 'text', '文本': 'text',
+    'mini': 'compact', 'txt': 'text',
+}
+# 精简卡片固定尺寸：不做背景缩放、模糊和 matplotlib 渲染，并以调色板 PNG 输出
+COMPACT_CARD_SIZE = (480, 168)
+COMPACT_CARD_COLORS = 64
+
+# 文字摘要与主题卡片中各字段的显示顺序
+TEXT_SUMMARY_FIELDS = ('system_info', 'temps', 'power', 'battery', 'extra', 'usage', 'net', 'uptime', 'time')
+
+ARCSTATS_PATH = '/proc/spl/kstat/zfs/arcstats'
+
+WARMUP_DATA = {
+    'cpu_percent': 0.0,
+    'mem_percent': 0.0,
+    'disk_percent': 0.0,
+    'temp_results': {},
+    'bat_data': {'percent': None, 'status_text': '电池信息: N/A'},
+    'extra_lines': [],
+    'system_info': platform.system(),
+    'uptime': '',
+    'net_sent': 0.0,
+    'net_recv': 0.0,
+    'current_time': '',
+}
+
+
+def _format_bytes(num: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num) < 1024:
+            return f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}TB"
 
 
 def _create_default_avatar(size: int) -> Image.Image:
@@ -77,6 +175,43 @@ class ServerMonitor(Star):
         self.temp_unit = sensor_cfg.get('temp_unit', 'C')
         self.show_temp_abbr = sensor_cfg.get('show_temp_abbr', True)
 
+        disk_cfg = self.config.get('disk_config', {})
+        self.show_disk_io = disk_cfg.get('show_disk_io', False)
+        self.show_smart = disk_cfg.get('show_smart', False)
+        self.smart_cache_ttl = disk_cfg.get('smart_cache_ttl', 1800)
+        self.max_disk_devices = disk_cfg.get('max_disk_devices', 3)
+        self.disk_devices = [d.strip() for d in disk_cfg.get('disk_devices', '').split(',') if d.strip()]
+        self._disk_io_prev: Optional[Tuple[float, Dict[str, Any]]] = None
+
+        detail_cfg = self.config.get('detail_config', {})
+        self.show_memory_detail = detail_cfg.get('show_memory_detail', False)
+        self.show_gpu_detail = detail_cfg.get('show_gpu_detail', False)
+        self._meminfo_reader = KeyValueReader('/proc/meminfo', [
+            'MemTotal', 'MemAvailable', 'SwapTotal', 'SwapFree',
+            'HugePages_Total', 'HugePages_Free', 'Hugepagesize',
+        ])
+        self._vmstat_reader = KeyValueReader('/proc/vmstat', ['pswpin', 'pswpout'])
+        self._arcstats_reader = KeyValueReader(ARCSTATS_PATH, ['size', 'c_max', 'hits', 'misses'], value_index=1)
+        self._swap_prev: Optional[Tuple[float, Dict[str, Optional[int]]]] = None
+
+        trends_cfg = self.config.get('trends_config', {})
+        self.show_trends = trends_cfg.get('enabled', False)
+        self.temp_windows: List[Tuple[str, int]] = []
+        for label in trends_cfg.get('temp_windows', '1h,24h').split(','):
+            seconds = parse_duration(label)
+            if seconds is not None:
+                self.temp_windows.append((label.strip(), seconds))
+        self.price_per_kwh = float(trends_cfg.get('price_per_kwh', 0))
+        self.currency = trends_cfg.get('currency', '元')
+        self.trends_checkpoint_interval = trends_cfg.get('checkpoint_interval', 300)
+        self.energy = EnergyMeter(max_gap=trends_cfg.get('max_power_gap', 300))
+        self._temp_stats: Dict[str, Dict[str, RollingStats]] = {}
+        self._trends_lock = threading.Lock()
+        self._trends_loaded = False
+        self.trends_file = self._data_file(TRENDS_FILE_NAME)
+        self._trends_saved_at = 0.0
+        self._power_seen_at = 0.0
+
         self.fixed_user_name = self.config.get('user_config', {}).get('fixed_user_name', 'AstroBot 用户')
         self.fixed_avatar_path = self.config.get('user_config', {}).get('fixed_avatar_path', '')
 
@@ -86,28 +221,166 @@ class ServerMonitor(Star):
         layout_cfg = self.config.get('layout_config', {})
         self.v_scale_factor = layout_cfg.get('vertical_scale', 1.0)
         self.h_scale_factor = layout_cfg.get('horizontal_scale', 1.0)
+
+        render_cfg = self.config.get('render_config', {})
+        self.max_output_size = int(render_cfg.get('max_output_size', 1280))
+        self.resample_mode = render_cfg.get('resample_mode', 'quality')
+        if self.resample_mode == 'fast':
+            self.resample = Image.Resampling.BILINEAR
+            self.png_compress_level = 1
+        else:
+            self.resample = Image.Resampling.LANCZOS
+            self.png_compress_level = 6
+        self.render_mode = render_cfg.get('render_mode', 'full')
+        self.auto_compact_load = float(render_cfg.get('auto_compact_load', 0.8))
+        self.auto_text_load = float(render_cfg.get('auto_text_load', 1.5))
+        # 各渲染模式的次数、平均耗时（毫秒）与平均体积（字节）
+        self._mode_stats: Dict[str, Dict[str, float]] = {
+            mode: {'count': 0, 'avg_ms': 0.0, 'avg_bytes': 0.0} for mode in RENDER_MODES
+        }
+
+        self.card_size: Tuple[int, int] = (900, 350)
+        self.bg_canvas: Optional[Image.Image] = None
+        self._avatar_source: Optional[Image.Image] = None
+        self._avatar_cache: Dict[int, Image.Image] = {}
+        self._font_cache: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+        self._chart_lock = threading.Lock()
+
+        self._assets_ready = False
+        self._asset_task: Optional[asyncio.Task] = None
+
+        self.background_sampling = self.config.get('sampling_config', {}).get('background_sampling', True)
+
+        live_cfg = self.config.get('live_config', {})
+        self.live_frames = max(2, int(live_cfg.get('frames', 30)))
+        self.live_format = 'gif' if live_cfg.get('format', 'webp').lower() == 'gif' else 'webp'
+        self.live_frame_duration = int(live_cfg.get('frame_duration', 200))
+        self.live_width = int(live_cfg.get('width', 720))
+        self.live_colors = int(live_cfg.get('colors', 128))
+        self.live_max_bytes = int(live_cfg.get('max_size_kb', 1024)) * 1024
+        self.live_max_encode_ms = int(live_cfg.get('max_encode_ms', 3000))
+        self._live_ms_per_frame: Optional[float] = None
+
+        rate_cfg = self.config.get('rate_limit_config', {})
+        self.rate_limiter: Optional[RateLimiter] = None
+        if rate_cfg.get('enabled', True):
+            self.rate_limiter = RateLimiter(
+                user_rate=rate_cfg.get('user_per_minute', 3), user_burst=rate_cfg.get('user_burst', 3),
+                group_rate=rate_cfg.get('group_per_minute', 6), group_burst=rate_cfg.get('group_burst', 6),
+                global_rate=rate_cfg.get('global_per_minute', 20), global_burst=rate_cfg.get('global_burst', 10),
+            )
+        self.throttle_reply = rate_cfg.get('throttle_reply', 'cached')
+        self.cached_card_max_age = rate_cfg.get('cached_card_max_age', 300)
+        self._render_slots = asyncio.Semaphore(max(1, int(rate_cfg.get('max_concurrent_renders', 1))))
+        self._last_card_path: Optional[str] = None
+        self._last_card_at = 0.0
+        self.providers = ProviderRegistry()
+        self._register_builtin_providers()
+
+        theme_cfg = self.config.get('theme_config', {})
+        self.default_theme = theme_cfg.get('default_theme', BUILTIN_THEME) or BUILTIN_THEME
+        self.themes = ThemeRegistry(PLUGIN_DIR / theme_cfg.get('theme_dir', 'themes'), PLUGIN_DIR, self._load_font,
+                                    {'main_title': self.main_title, 'font_path': self.content_font_path})
+        self._theme_selection: Optional[Dict[str, str]] = None
+        self.theme_selection_file = self._data_file(THEME_SELECTION_FILE_NAME)
         
         self.default_font = self._load_font('', 16) 
         
+        self._probe_background()
+
+    def _data_file(self, name: str) -> Path:
+        try:
+            data_dir = StarTools.get_data_dir(PLUGIN_NAME)
+        except (RuntimeError, ValueError) as e:
+            self.context.logger.warning(f"VisiStat 无法创建插件数据目录，{name} 改为保存在插件目录: {e}")
+            return PLUGIN_DIR / name
+        path = data_dir / name
+        # 旧版本把该文件保存在插件目录，首次启动时迁移过来
+        legacy = PLUGIN_DIR / name
+        if legacy.exists() and not path.exists():
+            try:
+                shutil.move(str(legacy), str(path))
+            except OSError as e:
+                self.context.logger.warning(f"VisiStat 迁移 {name} 失败: {e}")
+                return legacy
+        return path
+
+    async def initialize(self):
+        self._schedule_asset_preparation()
+        if self.background_sampling and self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self.providers.run())
+
+    async def _refresh_for_request(self):
+        # 后台采样开启时高成本数据源（如 smartctl）由各自的任务刷新，请求不等待它们，直接使用最近一次的值
+        exclude = (COST_EXPENSIVE,) if self._monitor_task is not None else ()
+        await self.providers.refresh(exclude_costs=exclude)
+
+    def _schedule_asset_preparation(self):
+        if self._asset_task is None:
+            self._asset_task = asyncio.create_task(self._prepare_assets())
+
+    async def _prepare_assets(self):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, self._prepare_assets_sync)
+        except Exception as e:
+            self.context.logger.error(f"VisiStat asset preparation failed: {e}")
+        finally:
+            self._assets_ready = True
+        self.context.logger.debug(f"VisiStat assets ready in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def _prepare_assets_sync(self):
         self._setup_caching()
+        avatar_img = self._load_avatar(self._avatar_limit())
+        # 预渲染一张卡片：加载 matplotlib、各字号字体以及圆形头像缓存
+        self._draw_status_card(WARMUP_DATA, avatar_img, self.fixed_user_name)
+
+    def _set_card_size(self, size: Tuple[int, int]):
+        self.card_size = size
+        CARD_WIDTH, CARD_HEIGHT = size
+        if CARD_HEIGHT > 0:
+            aspect_ratio = CARD_WIDTH / CARD_HEIGHT
+            self.is_horizontal = aspect_ratio > 1.2 
+
+    def _probe_background(self):
+        # 只读取图片头部获取尺寸，保证资源准备完成前的回退卡片与最终排版一致
+        if not self.bg_image_path:
+            return
+        try:
+            with Image.open(str(PLUGIN_DIR / self.bg_image_path)) as img:
+                self._set_card_size(self._fit_output_size(img.size))
+        except Exception:
+            pass
+
+    def _fit_output_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        width, height = size
+        longest = max(width, height)
+        if self.max_output_size <= 0 or longest <= self.max_output_size:
+            return width, height
+        ratio = self.max_output_size / longest
+        return max(1, int(width * ratio)), max(1, int(height * ratio))
 
     def _setup_caching(self):
         CARD_WIDTH, CARD_HEIGHT = 900, 350
         bg_img = None
+        source_width = 0
 
         if self.bg_image_path:
             try:
                 bg_path = PLUGIN_DIR / self.bg_image_path
                 bg_img = Image.open(str(bg_path)).convert("RGBA")
-                CARD_WIDTH, CARD_HEIGHT = bg_img.size
+                source_width = bg_img.size[0]
+                CARD_WIDTH, CARD_HEIGHT = self._fit_output_size(bg_img.size)
+                if bg_img.size != (CARD_WIDTH, CARD_HEIGHT):
+                    bg_img = bg_img.resize((CARD_WIDTH, CARD_HEIGHT), Image.Resampling.LANCZOS)
             except Exception:
-                pass
+                bg_img = None
         
-        if CARD_HEIGHT > 0:
-            aspect_ratio = CARD_WIDTH / CARD_HEIGHT
-            self.is_horizontal = aspect_ratio > 1.2 
+        self._set_card_size((CARD_WIDTH, CARD_HEIGHT))
         
         if self.blur_radius <= 0 or not self.bg_image_path:
+            self.bg_canvas = bg_img
             return
 
         cache_data = {}
@@ -119,38 +392,62 @@ class ServerMonitor(Star):
                 pass
 
         original_bg_name = self.bg_image_path
+        output_size = [CARD_WIDTH, CARD_HEIGHT]
         
         cached_blur_path = cache_data.get('blurred_bg_path')
         cached_blur_source = cache_data.get('source_image')
         cached_blur_radius = cache_data.get('blur_radius')
+        cached_output_size = cache_data.get('output_size')
 
         if (cached_blur_path and 
-            (PLUGIN_DIR / cached_blur_path).exists() and
+            (CACHE_DIR / cached_blur_path).exists() and
             cached_blur_source == original_bg_name and
-            cached_blur_radius == self.blur_radius):
+            cached_blur_radius == self.blur_radius and
+            cached_output_size == output_size):
             
-            self.blurred_bg_path = PLUGIN_DIR / cached_blur_path
+            self.blurred_bg_path = CACHE_DIR / cached_blur_path
+            try:
+                self.bg_canvas = Image.open(str(self.blurred_bg_path)).convert("RGBA")
+            except Exception:
+                self.bg_canvas = None
         
         elif bg_img:
             try:
-                blurred_img = bg_img.convert("RGB").filter(ImageFilter.GaussianBlur(self.blur_radius)).convert("RGBA")
+                scaled_radius = self._scaled_blur_radius(source_width, CARD_WIDTH)
+                blurred_img = bg_img.convert("RGB").filter(ImageFilter.GaussianBlur(scaled_radius)).convert("RGBA")
                 
                 bg_stem = Path(original_bg_name).stem
-                new_blur_filename = f"cached_blurred_{bg_stem}_{self.blur_radius}.png"
-                self.blurred_bg_path = PLUGIN_DIR / new_blur_filename
+                new_blur_filename = f"cached_blurred_{bg_stem}_{self.blur_radius}_{CARD_WIDTH}x{CARD_HEIGHT}.png"
+                self.blurred_bg_path = CACHE_DIR / new_blur_filename
                 blurred_img.save(str(self.blurred_bg_path))
+                self.bg_canvas = blurred_img
                 
                 with open(CACHE_FILE, 'w', encoding='utf-8') as f:
                     json.dump({
                         'blurred_bg_path': new_blur_filename,
                         'source_image': original_bg_name,
-                        'blur_radius': self.blur_radius
+                        'blur_radius': self.blur_radius,
+                        'output_size': output_size
                     }, f)
             except Exception as e:
                 self.blurred_bg_path = None
                 self.context.logger.error(f"Background blur caching failed: {e}")
 
+    def _scaled_blur_radius(self, source_width: int, output_width: int) -> float:
+        # 模糊半径按原图尺寸配置，缩放后按比例换算以保持相同观感
+        if not source_width:
+            return self.blur_radius
+        return self.blur_radius * output_width / source_width
+
     def _load_font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
+        cache_key = (font_path, size)
+        font = self._font_cache.get(cache_key)
+        if font is None:
+            font = self._open_font(font_path, size)
+            self._font_cache[cache_key] = font
+        return font
+
+    def _open_font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
         if font_path:
             try:
                 full_path = PLUGIN_DIR / font_path
@@ -164,16 +461,42 @@ class ServerMonitor(Star):
         except IOError:
             return ImageFont.load_default()
 
+    def _avatar_limit(self) -> int:
+        # 两种布局中头像的最大边长：竖屏为短边的 15%，横屏为高度的 12% 乘以最大 1.5 倍的动态缩放。
+        # 不低于 300，主题卡片中的头像同样不会被放大
+        width, height = self.card_size
+        vertical = min(width, height) * 0.15 * self.v_scale_factor
+        horizontal = height * 0.12 * 1.5 * self.h_scale_factor
+        return max(AVATAR_MIN_SIZE, math.ceil(max(vertical, horizontal)))
+
     def _load_avatar(self, size: int) -> Image.Image:
+        if self._avatar_source is not None:
+            return self._avatar_source
+
+        img = None
         if self.fixed_avatar_path:
             try:
                 avatar_path = PLUGIN_DIR / self.fixed_avatar_path
                 img = Image.open(str(avatar_path)).convert("RGBA")
-                return img
+                # 头像最终只会缩放到卡片尺寸的一小部分，加载时先缩到上限，避免每次从原图缩放
+                img.thumbnail((size, size), Image.Resampling.LANCZOS)
             except Exception:
-                pass
+                img = None
         
-        return _create_default_avatar(size)
+        if img is None:
+            img = _create_default_avatar(size)
+        self._avatar_source = img
+        return img
+
+    def _get_circular_avatar(self, avatar_img: Image.Image, size: int) -> Image.Image:
+        cacheable = avatar_img is self._avatar_source
+        if cacheable and size in self._avatar_cache:
+            return self._avatar_cache[size]
+
+        circular = self._make_circular(avatar_img.resize((size, size), self.resample))
+        if cacheable:
+            self._avatar_cache[size] = circular
+        return circular
 
     def _get_uptime(self) -> str:
         boot_time = psutil.boot_time()
@@ -206,6 +529,12 @@ class ServerMonitor(Star):
         return circular_img
 
     def _create_pie_chart(self, value: float, color: str, bg_color: str, size: int) -> Image.Image:
+        # pyplot 是全局状态机，后台预热线程与请求渲染不能同时绘图
+        with self._chart_lock:
+            return self._render_pie_chart(value, color, bg_color, size)
+
+    def _render_pie_chart(self, value: float, color: str, bg_color: str, size: int) -> Image.Image:
+        plt = _get_pyplot()
         buffer = io.BytesIO()
         
         plt.figure(figsize=(size/100, size/100), dpi=100) 
@@ -215,7 +544,9 @@ class ServerMonitor(Star):
         
 
         try:
-            font = self._load_font(self.content_font_path, int(size*0.09)).getname()
+            chart_font = self._load_font(self.content_font_path, int(size*0.09))
+            _register_chart_font(getattr(chart_font, 'path', None))
+            font = chart_font.getname()
             plt.rcParams['font.family'] = font[0]
             plt.rcParams['font.sans-serif'] = [font[0]]
             plt.rcParams['axes.unicode_minus'] = False
@@ -234,51 +565,121 @@ class ServerMonitor(Star):
         buffer.seek(0)
         
         chart_image = Image.open(buffer).convert("RGBA")
-        chart_image = chart_image.resize((size, size), Image.Resampling.LANCZOS)
+        if chart_image.size != (size, size):
+            chart_image = chart_image.resize((size, size), self.resample)
         
         plt.clf()
         plt.close('all')
         return chart_image
 
-    def _get_linux_temp_data(self, temp_unit: str) -> Dict[str, Optional[float]]:
-        temp_data = {'cpu_temp': None, 'gpu_temp': None, 'bat_temp': None, 'power_w': None}
-        try:
-            if self.monitor_cpu_temp and self.external_cpu_temp_file:
-                with open(self.external_cpu_temp_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                m = re.search(r'CPU\s*[:=]?\s*([-+]?\d+(?:\.\d+)?)\s*°?\s*([CF])?', content, re.IGNORECASE)
-                if not m:
-                    m = re.search(r'\bcpu\b[^\d+-]*([-+]?\d+(?:\.\d+)?)\s*°?\s*([CF])?', content, re.IGNORECASE)
-                if m:
-                    val = float(m.group(1))
-                    fu = m.group(2).upper() if m.group(2) else (self.external_temp_file_unit or 'C').upper()
-                    tu = (temp_unit or 'C').upper()
-                    if fu == 'F':
-                        c = (val - 32) * 5/9
-                    else:
-                        c = val
-                    if tu == 'F':
-                        temp_data['cpu_temp'] = c * 9/5 + 32
-                    else:
-                        temp_data['cpu_temp'] = c
-                p = re.search(r'POWER\s*[:=]?\s*([-+]?\d+(?:\.\d+)?)\s*W', content, re.IGNORECASE)
-                if not p:
-                    p = re.search(r'\bpower\b[^\d+-]*([-+]?\d+(?:\.\d+)?)\s*W', content, re.IGNORECASE)
-                if p:
-                    temp_data['power_w'] = float(p.group(1))
-        except Exception:
-            pass
-        
-        if not hasattr(psutil, "sensors_temperatures"):
-            return temp_data
+    def _register_builtin_providers(self):
+        system = platform.system()
+        has_hwmon = hasattr(psutil, "sensors_temperatures") and system != "Windows"
+
+        self.providers.register(MetricProvider(
+            'cpu', self._sample_cpu, interval=2, cost=COST_CHEAP,
+            formatter=lambda v: [f"CPU: {v:.1f}%"]))
+        self.providers.register(MetricProvider(
+            'memory', self._sample_memory, interval=5, cost=COST_CHEAP,
+            formatter=lambda v: [f"MEM: {v:.1f}%"]))
+        self.providers.register(MetricProvider(
+            'disk', self._sample_disk, interval=30, cost=COST_CHEAP,
+            formatter=lambda v: [f"DISK: {v:.1f}%"]))
+        self.providers.register(MetricProvider(
+            'net', self._sample_net, interval=5, cost=COST_CHEAP,
+            formatter=lambda v: [f"网络流量: ↑{v['sent_mb']:.2f}MB ↓{v['recv_mb']:.2f}MB"]))
+        self.providers.register(MetricProvider(
+            'hwmon', self._sample_hwmon, interval=5, cost=COST_MODERATE,
+            formatter=self._format_temp_lines,
+            enabled=has_hwmon and (self.monitor_cpu_temp or self.monitor_gpu_temp or self.monitor_bat_temp)))
+        self.providers.register(MetricProvider(
+            'external_file', self._sample_external_file, interval=5, cost=COST_CHEAP,
+            formatter=self._format_external_lines,
+            enabled=bool(self.monitor_cpu_temp and self.external_cpu_temp_file)))
+        self.providers.register(MetricProvider(
+            'battery', self._sample_battery, interval=30, cost=COST_CHEAP,
+            formatter=lambda v: [v['status_text']] if v.get('percent') is not None else [],
+            enabled=self.monitor_battery_status))
+        self.providers.register(MetricProvider(
+            'wmi', self._sample_wmi, interval=10, cost=COST_EXPENSIVE,
+            formatter=self._format_temp_lines,
+            enabled=system == "Windows" and self.monitor_cpu_temp))
+        self.providers.register(MetricProvider(
+            'disk_io', self._sample_disk_io, interval=5, cost=COST_CHEAP,
+            formatter=self._format_disk_io_lines,
+            enabled=self.show_disk_io))
+        # SMART 查询需要唤醒磁盘控制器并调用 smartctl，使用较长的缓存时间
+        self.providers.register(MetricProvider(
+            'smart', self._sample_smart, interval=self.smart_cache_ttl, cost=COST_EXPENSIVE,
+            formatter=self._format_smart_lines,
+            enabled=self.show_smart and system == "Linux"))
+        self.providers.register(MetricProvider(
+            'memory_detail', self._sample_memory_detail, interval=5, cost=COST_CHEAP,
+            formatter=self._format_memory_detail_lines,
+            enabled=self.show_memory_detail and system == "Linux"))
+        self.providers.register(MetricProvider(
+            'gpu', read_amdgpu, interval=5, cost=COST_CHEAP,
+            formatter=self._format_gpu_lines,
+            enabled=self.show_gpu_detail and system == "Linux"))
+        # 温度与功率趋势读取其他数据源的结果，本身不访问硬件
+        self.providers.register(MetricProvider(
+            'trends', self._sample_trends, interval=5, cost=COST_CHEAP,
+            formatter=self._format_trend_lines,
+            enabled=self.show_trends))
+
+    def _sample_cpu(self) -> float:
+        # 首次调用没有参考点，阻塞 0.1 秒取样；后台采样时按采样间隔计算两次调用之间的平均占用。
+        # 关闭后台采样时两次请求可能相隔数小时，平均值不能反映当前占用，每次都阻塞 0.1 秒取样
+        if not self.background_sampling or self.providers.get('cpu').samples == 0:
+            return psutil.cpu_percent(interval=0.1)
+        return psutil.cpu_percent(interval=None)
+
+    def _sample_memory(self) -> float:
+        return psutil.virtual_memory().percent
+
+    def _sample_disk(self) -> float:
+        return psutil.disk_usage('/').percent
+
+    def _sample_net(self) -> Dict[str, float]:
+        net = psutil.net_io_counters()
+        return {
+            'sent_mb': net.bytes_sent / (1024 * 1024),
+            'recv_mb': net.bytes_recv / (1024 * 1024),
+        }
+
+    def _sample_external_file(self) -> Dict[str, Optional[float]]:
+        temp_data = {'cpu_temp': None, 'power_w': None}
+        temp_unit = self.temp_unit
+        with open(self.external_cpu_temp_file, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+        m = re.search(r'CPU\s*[:=]?\s*([-+]?\d+(?:\.\d+)?)\s*°?\s*([CF])?', content, re.IGNORECASE)
+        if not m:
+            m = re.search(r'\bcpu\b[^\d+-]*([-+]?\d+(?:\.\d+)?)\s*°?\s*([CF])?', content, re.IGNORECASE)
+        if m:
+            val = float(m.group(1))
+            fu = m.group(2).upper() if m.group(2) else (self.external_temp_file_unit or 'C').upper()
+            tu = (temp_unit or 'C').upper()
+            if fu == 'F':
+                c = (val - 32) * 5/9
+            else:
+                c = val
+            if tu == 'F':
+                temp_data['cpu_temp'] = c * 9/5 + 32
+            else:
+                temp_data['cpu_temp'] = c
+        p = re.search(r'POWER\s*[:=]?\s*([-+]?\d+(?:\.\d+)?)\s*W', content, re.IGNORECASE)
+        if not p:
+            p = re.search(r'\bpower\b[^\d+-]*([-+]?\d+(?:\.\d+)?)\s*W', content, re.IGNORECASE)
+        if p:
+            temp_data['power_w'] = float(p.group(1))
+        return temp_data
 
-        try:
-            fahrenheit = temp_unit.upper() == 'F'
-            temps = psutil.sensors_temperatures(fahrenheit=fahrenheit)
-        except Exception:
-            return temp_data
+    def _sample_hwmon(self) -> Dict[str, Optional[float]]:
+        temp_data = {'cpu_temp': None, 'gpu_temp': None, 'bat_temp': None}
+        fahrenheit = self.temp_unit.upper() == 'F'
+        temps = psutil.sensors_temperatures(fahrenheit=fahrenheit)
         
-        if self.monitor_cpu_temp and temp_data['cpu_temp'] is None:
+        if self.monitor_cpu_temp:
             cpu_temps = temps.get('coretemp', temps.get('cpu_thermal'))
             if not cpu_temps:
                 for name, entries in temps.items():
@@ -303,47 +704,32 @@ class ServerMonitor(Star):
                     
         return temp_data
 
-    def _get_windows_temp_via_wmi(self, temp_unit: str) -> Dict[str, Optional[float]]:
+    def _sample_wmi(self) -> Dict[str, Optional[float]]:
         temp_results = {}
+        wmi = _get_wmi()
         if wmi is None:
             return temp_results
 
-        if self.monitor_cpu_temp:
-            try:
-                c = wmi.WMI(namespace="root\\wmi")
-                temperature_data = c.MSAcpi_ThermalZoneTemperature()
-                if temperature_data:
-                    temp_k_times_10 = temperature_data[0].CurrentTemperature
-                    temp_c = (temp_k_times_10 - 2732) / 10.0
-                    if temp_unit.upper() == 'F':
-                        temp_results['cpu_temp'] = temp_c * 9/5 + 32
-                    else:
-                        temp_results['cpu_temp'] = temp_c
-            except Exception:
-                temp_results['cpu_temp'] = None
+        try:
+            c = wmi.WMI(namespace="root\\wmi")
+            temperature_data = c.MSAcpi_ThermalZoneTemperature()
+            if temperature_data:
+                temp_k_times_10 = temperature_data[0].CurrentTemperature
+                temp_c = (temp_k_times_10 - 2732) / 10.0
+                if self.temp_unit.upper() == 'F':
+                    temp_results['cpu_temp'] = temp_c * 9/5 + 32
+                else:
+                    temp_results['cpu_temp'] = temp_c
+        except Exception:
+            temp_results['cpu_temp'] = None
         
         return temp_results
 
-    def _get_sensor_data(self) -> Tuple[Dict[str, Optional[float]], Dict[str, Any]]:
-        temp_results = {}
-        
-        if platform.system() == "Linux":
-            temp_results = self._get_linux_temp_data(self.temp_unit)
-        elif platform.system() == "Windows":
-            temp_results = self._get_windows_temp_via_wmi(self.temp_unit)
-        else:
-            if self.monitor_cpu_temp:
-                if hasattr(psutil, "sensors_temperatures"):
-                    temps = psutil.sensors_temperatures(fahrenheit=self.temp_unit.upper() == 'F')
-                    cpu_temps = temps.get('coretemp', [])
-                    if cpu_temps:
-                        temp_results['cpu_temp'] = max(e.current for e in cpu_temps if e.current is not None)
-                
-
+    def _sample_battery(self) -> Dict[str, Any]:
         bat = psutil.sensors_battery()
         bat_data = {'percent': None, 'status_text': '电池信息: N/A'}
         
-        if self.monitor_battery_status and bat:
+        if bat:
             bat_percent = bat.percent
             is_charging = bat.power_plugged
             
@@ -364,8 +750,242 @@ class ServerMonitor(Star):
             
             bat_data = {'percent': bat_percent, 'status_text': status_text}
 
+        return bat_data
+
+    def _sample_disk_io(self) -> Optional[Dict[str, Dict[str, float]]]:
+        now = time.monotonic()
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        prev = self._disk_io_prev
+        self._disk_io_prev = (now, counters)
+        if prev is None:
+            return None
+        return compute_disk_rates(prev[1], counters, now - prev[0], self.disk_devices)
+
+    def _sample_smart(self) -> Dict[str, Dict[str, Any]]:
+        return {device: read_smart_health(device) for device in list_smart_devices(devices=self.disk_devices)}
+
+    def _sample_memory_detail(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        vmstat = self._vmstat_reader.read()
+        swap_rates = None
+        if self._swap_prev is not None and vmstat['pswpin'] is not None:
+            elapsed = now - self._swap_prev[0]
+            prev = self._swap_prev[1]
+            if elapsed > 0 and prev['pswpin'] is not None:
+                page_size = os.sysconf('SC_PAGE_SIZE')
+                swap_rates = {
+                    'in': (vmstat['pswpin'] - prev['pswpin']) * page_size / elapsed,
+                    'out': (vmstat['pswpout'] - prev['pswpout']) * page_size / elapsed,
+                }
+        self._swap_prev = (now, vmstat)
+
+        arc = self._arcstats_reader.read()
+        return {
+            'meminfo': self._meminfo_reader.read(),
+            'arc': arc if arc['size'] is not None else None,
+            'ksm': read_ksm(),
+            'swap_rates': swap_rates,
+            'pressure': read_pressure(),
+        }
+
+    def _format_memory_detail_lines(self, detail: Dict[str, Any]) -> List[str]:
+        lines = []
+        meminfo = detail['meminfo']
+        page_size = os.sysconf('SC_PAGE_SIZE')
+
+        arc = detail['arc']
+        if arc:
+            lookups = (arc['hits'] or 0) + (arc['misses'] or 0)
+            hit_text = f" 命中率 {arc['hits'] / lookups * 100:.1f}%" if lookups else ""
+            lines.append(f"ZFS ARC: {_format_bytes(arc['size'])} / {_format_bytes(arc['c_max'] or 0)}{hit_text}")
+
+        ksm = detail['ksm']
+        if ksm and ksm['pages_sharing']:
+            lines.append(f"KSM 共享: {_format_bytes(ksm['pages_sharing'] * page_size)}")
+
+        if meminfo['HugePages_Total']:
+            used = meminfo['HugePages_Total'] - (meminfo['HugePages_Free'] or 0)
+            lines.append(f"大页: {used}/{meminfo['HugePages_Total']} ({_format_bytes((meminfo['Hugepagesize'] or 0) * 1024)})")
+
+        swap_rates = detail['swap_rates']
+        if meminfo['SwapTotal'] and swap_rates is not None:
+            lines.append(f"交换: 换入 {_format_bytes(swap_rates['in'])}/s 换出 {_format_bytes(swap_rates['out'])}/s")
+
+        pressure = detail['pressure']
+        if pressure:
+            lines.append(f"内存压力: some {pressure.get('some', 0.0):.2f}% full {pressure.get('full', 0.0):.2f}%")
+        return lines
+
+    def _format_gpu_lines(self, gpus: Dict[str, Dict[str, Optional[int]]]) -> List[str]:
+        lines = []
+        for card, gpu in gpus.items():
+            line = f"GPU {card}: {gpu['busy_percent']}%"
+            if gpu['vram_used'] is not None and gpu['vram_total']:
+                line += f" 显存 {_format_bytes(gpu['vram_used'])} / {_format_bytes(gpu['vram_total'])}"
+            lines.append(line)
+        return lines
+
+    def _format_disk_io_lines(self, rates: Dict[str, Dict[str, float]]) -> List[str]:
+        busiest = sorted(rates.items(), key=lambda item: item[1]['read_mb_s'] + item[1]['write_mb_s'], reverse=True)
+        lines = []
+        for name, r in busiest[:self.max_disk_devices]:
+            lines.append(f"磁盘IO {name}: 读{r['read_mb_s']:.1f} 写{r['write_mb_s']:.1f}MB/s "
+                         f"{r['iops']:.0f}IOPS {r['await_ms']:.1f}ms")
+        return lines
+
+    def _format_smart_lines(self, health: Dict[str, Dict[str, Any]]) -> List[str]:
+        lines = []
+        for name, h in list(health.items())[:self.max_disk_devices]:
+            parts = []
+            if h['temperature'] is not None:
+                temp = h['temperature'] * 9/5 + 32 if self.temp_unit.upper() == 'F' else h['temperature']
+                parts.append(f"{temp:.0f}°{self.temp_unit.upper()}")
+            if h['percentage_used'] is not None:
+                parts.append(f"已用寿命 {h['percentage_used']}%")
+            if h['media_errors'] is not None:
+                parts.append(f"介质错误 {h['media_errors']}")
+            if parts:
+                lines.append(f"磁盘健康 {name}: " + " ".join(parts))
+        return lines
+
+    def _temp_window_stats(self, key: str) -> Dict[str, RollingStats]:
+        stats = self._temp_stats.get(key)
+        if stats is None:
+            stats = {label: RollingStats(seconds) for label, seconds in self.temp_windows}
+            self._temp_stats[key] = stats
+        return stats
+
+    def _load_trends(self, now: float):
+        self._trends_loaded = True
+        state = load_checkpoint(str(self.trends_file))
+        if not state or state.get('v') != TRENDS_CHECKPOINT_VERSION:
+            return
+        self.energy.restore(state.get('energy', {}))
+        self._power_seen_at = self.energy.last_ts or 0.0
+        # 更换温度单位后旧的温度数据不再可比，直接丢弃
+        if state.get('unit') != self.temp_unit.upper():
+            return
+        for key, windows in state.get('temps', {}).items():
+            for label, buckets in windows.items():
+                stats = self._temp_window_stats(key).get(label)
+                if stats is not None:
+                    stats.restore(buckets, now)
+
+    def _save_trends(self, now: float):
+        state = {
+            'v': TRENDS_CHECKPOINT_VERSION,
+            'unit': self.temp_unit.upper(),
+            'saved_at': round(now),
+            'temps': {key: {label: s.checkpoint() for label, s in windows.items()}
+                      for key, windows in self._temp_stats.items()},
+            'energy': self.energy.checkpoint(),
+        }
+        try:
+            save_checkpoint(str(self.trends_file), state)
+            self._trends_saved_at = now
+        except OSError as e:
+            self.context.logger.warning(f"VisiStat 趋势数据保存失败: {e}")
+
+    def _sample_trends(self) -> Dict[str, Any]:
+        with self._trends_lock:
+            now = time.time()
+            if not self._trends_loaded:
+                self._load_trends(now)
+
+            temp_results, _ = self._get_sensor_data()
+            for key, _ in TEMP_KEYS:
+                value = temp_results.get(key)
+                if value is not None and value > 0.1:
+                    for stats in self._temp_window_stats(key).values():
+                        stats.add(now, value)
+
+            # 按外部文件的采样时间积分功率，而不是以本数据源的采样时刻为准
+            external = self.providers.get('external_file')
+            for ts, value in list(external.history):
+                if ts > self._power_seen_at and value.get('power_w') is not None:
+                    self.energy.add(ts, value['power_w'])
+                    self._power_seen_at = ts
+
+            if now - self._trends_saved_at >= self.trends_checkpoint_interval:
+                self._save_trends(now)
+
+            temps = {}
+            for key, windows in self._temp_stats.items():
+                temps[key] = {label: stats.summary(now) for label, stats in windows.items()}
+            has_energy = bool(self.energy.daily_kwh) or self._power_seen_at > 0
+            return {
+                'temps': temps,
+                'energy': self.energy.totals(now) if has_energy else None,
+            }
+
+    def _format_trend_lines(self, value: Dict[str, Any]) -> List[str]:
+        lines = []
+        unit = self.temp_unit.upper()
+        for label, _ in self.temp_windows:
+            parts = []
+            for key, abbr in TEMP_KEYS:
+                summary = value['temps'].get(key, {}).get(label)
+                if summary is not None:
+                    lo, hi, avg = summary
+                    parts.append(f"{abbr} {lo:.1f}~{hi:.1f}°{unit}(均{avg:.1f})")
+            if parts:
+                lines.append(f"温度 {label}: " + " ".join(parts))
+
+        energy = value['energy']
+        if energy is not None:
+            lines.append(f"用电: 今日 {energy['day']:.2f}kWh 本周 {energy['week']:.2f}kWh 本月 {energy['month']:.2f}kWh")
+            if self.price_per_kwh > 0:
+                lines.append(
+                    f"电费: 今日 {energy['day'] * self.price_per_kwh:.2f}{self.currency} "
+                    f"本周 {energy['week'] * self.price_per_kwh:.2f}{self.currency} "
+                    f"本月 {energy['month'] * self.price_per_kwh:.2f}{self.currency}"
+                )
+        return lines
+
+    def _format_temp_lines(self, temp_results: Dict[str, Optional[float]]) -> List[str]:
+        return [f"系统温度: {label}{value}" for label, value in self._format_temp_data(temp_results)]
+
+    def _format_external_lines(self, value: Dict[str, Optional[float]]) -> List[str]:
+        lines = self._format_temp_lines({'cpu_temp': value.get('cpu_temp')})[:1]
+        if value.get('power_w') is not None:
+            lines.append(f"系统功率: {value['power_w']:.1f}W")
+        return lines
+
+    def _get_sensor_data(self) -> Tuple[Dict[str, Optional[float]], Dict[str, Any]]:
+        temp_results = {'cpu_temp': None, 'gpu_temp': None, 'bat_temp': None, 'power_w': None}
+        # 外部温度文件优先，其次是 hwmon / WMI
+        for name in ('wmi', 'hwmon', 'external_file'):
+            for key, value in (self.providers.value(name) or {}).items():
+                if value is not None:
+                    temp_results[key] = value
+
+        bat_data = self.providers.value('battery') or {'percent': None, 'status_text': '电池信息: N/A'}
         return temp_results, bat_data
 
+    def _get_extra_lines(self) -> List[str]:
+        lines = []
+        for provider in self.providers.enabled():
+            if provider.name not in BUILTIN_PROVIDERS:
+                lines.extend(provider.format())
+        return lines
+
+    def _collect_status_data(self) -> Dict[str, Any]:
+        temp_results, bat_data = self._get_sensor_data()
+        net = self.providers.value('net', {'sent_mb': 0.0, 'recv_mb': 0.0})
+        return {
+            'cpu_percent': self.providers.value('cpu', 0.0),
+            'mem_percent': self.providers.value('memory', 0.0),
+            'disk_percent': self.providers.value('disk', 0.0),
+            'temp_results': temp_results, 
+            'bat_data': bat_data, 
+            'extra_lines': self._get_extra_lines(),
+            'system_info': f"{platform.system()} {platform.release()} ({platform.machine()})" if self.system_info == 'default' or not self.system_info else self.system_info,
+            'uptime': self._get_uptime(),
+            'net_sent': net['sent_mb'],
+            'net_recv': net['recv_mb'],
+            'current_time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
 
     def _manual_wrap_text(self, text, font, draw_obj, max_width):
         if not text: return [""]
@@ -389,6 +1009,21 @@ class ServerMonitor(Star):
         
         return lines
 
+    def _wrap_lines(self, lines, font, draw_obj, max_width):
+        wrapped = []
+        for line in lines:
+            wrapped.extend(self._manual_wrap_text(line, font, draw_obj, max_width))
+        return wrapped
+
+    def _fit_extra_lines(self, lines, max_lines):
+        # 附加行只占用卡片剩余的空间，放不下的行折叠为一行提示，避免挤出标题或网络流量
+        if len(lines) <= max_lines:
+            return lines
+        if max_lines <= 0:
+            return []
+        hidden = len(lines) - max_lines + 1
+        return lines[:max_lines - 1] + [f"… 另有 {hidden} 行未显示"]
+
     def _format_temp_data(self, temp_results: Dict[str, Optional[float]]) -> List[Tuple[str, str]]:
         temp_data_list = []
         unit = self.temp_unit.upper()
@@ -466,11 +1101,10 @@ class ServerMonitor(Star):
         
         L_bat = 1 if self.monitor_battery_status and data['bat_data']['percent'] is not None else 0
         L_B += L_bat
+        extra_lines = self._wrap_lines(data['extra_lines'], content_font_medium, draw, INFO_MAX_WIDTH)
         
         L_fixed = 2 
         L_B += L_fixed
-        
-        H_B = L_B * LINE_SPACING
 
         gap_charts = MARGIN_BASE // 2
         CHART_SIZE = (CARD_WIDTH - 2 * MARGIN_BASE - 2 * gap_charts) // 3 
@@ -487,6 +1121,11 @@ class ServerMonitor(Star):
         
 
         H_FIXED_GAPS = 5 * M
+
+        extra_budget = (CARD_HEIGHT - (H_A + L_B * LINE_SPACING + H_C + H_FIXED_GAPS + SEPARATOR_WIDTH)) // LINE_SPACING
+        extra_lines = self._fit_extra_lines(extra_lines, extra_budget)
+        L_B += len(extra_lines)
+        H_B = L_B * LINE_SPACING
         
         H_REQUIRED = H_A + H_B + H_C + H_FIXED_GAPS + SEPARATOR_WIDTH
         
@@ -498,8 +1137,7 @@ class ServerMonitor(Star):
 
         HEADER_Y_START = OFFSET_Y + M
         
-        avatar_img = avatar_img.resize((AVATAR_SIZE, AVATAR_SIZE), Image.Resampling.LANCZOS)
-        avatar_img = self._make_circular(avatar_img)
+        avatar_img = self._get_circular_avatar(avatar_img, AVATAR_SIZE)
         
 
         avatar_y_start = HEADER_Y_START + (H_A - AVATAR_SIZE) // 2 
@@ -550,6 +1188,10 @@ class ServerMonitor(Star):
             draw.text((x_pos, current_y), data['bat_data']['status_text'], font=content_font_medium, fill=text_block_fill)
             current_y += LINE_SPACING
 
+        for line in extra_lines:
+            draw.text((x_pos, current_y), line, font=content_font_medium, fill=text_block_fill)
+            current_y += LINE_SPACING
+
         info_lines_block1_simple = [
             (f"运行时间: {data['uptime']}", content_font_medium),
             (f"当前时间: {data['current_time']}", content_font_medium),
@@ -587,9 +1229,9 @@ class ServerMonitor(Star):
         current_y += MARGIN_BASE 
         
         charts = [
-            ("CPU", data['cpu_percent'], data['cpu_image']),
-            ("MEM", data['mem_percent'], data['mem_image']),
-            ("DISK", data['disk_percent'], data['disk_image']),
+            ("CPU", data['cpu_percent']),
+            ("MEM", data['mem_percent']),
+            ("DISK", data['disk_percent']),
         ]
 
         gap_charts = MARGIN_BASE // 2
@@ -612,8 +1254,8 @@ class ServerMonitor(Star):
         
         chart_y = chart_y_start
         
-        for i, (label, value, chart_img) in enumerate(charts):
-            resized_chart_img = chart_img.resize((CHART_SIZE, CHART_SIZE), Image.Resampling.LANCZOS)
+        for i, (label, value) in enumerate(charts):
+            chart_img = self._create_pie_chart(value, self.bing_dark, self.bing_light, CHART_SIZE)
             
             chart_x = start_x + i * (CHART_SIZE + gap_charts)
             
@@ -624,7 +1266,7 @@ class ServerMonitor(Star):
             
             draw.text((label_x, label_y), label, font=label_font, fill=self.font_color)
             
-            canvas.paste(resized_chart_img, (chart_x, int(chart_y)), resized_chart_img)
+            canvas.paste(chart_img, (chart_x, int(chart_y)), chart_img)
             
         return canvas
 
@@ -720,11 +1362,16 @@ class ServerMonitor(Star):
         simple_lines_count = 4 
         if self.monitor_battery_status and data['bat_data']['percent'] is not None:
              simple_lines_count += 1
+        extra_lines = self._wrap_lines(data['extra_lines'], content_font_medium, draw, INFO_MAX_WIDTH)
+        
+        HEADER_CONTENT_GAP = MARGIN // 2 
+        base_A_block_height = HEADER_H + HEADER_CONTENT_GAP + (sys_info_lines_count + temp_lines_count + power_lines_count + simple_lines_count) * LINE_SPACING + MARGIN // 2
+        extra_lines = self._fit_extra_lines(extra_lines, (total_card_vertical_space - base_A_block_height) // LINE_SPACING)
+        simple_lines_count += len(extra_lines)
         
         total_A_content_lines = sys_info_lines_count + temp_lines_count + power_lines_count + simple_lines_count
         total_A_content_height = total_A_content_lines * LINE_SPACING + MARGIN // 2
         
-        HEADER_CONTENT_GAP = MARGIN // 2 
         total_A_block_height = HEADER_H + HEADER_CONTENT_GAP + total_A_content_height
 
         initial_y_offset_A = (total_card_vertical_space - total_A_block_height) // 2 
@@ -732,8 +1379,7 @@ class ServerMonitor(Star):
         
         HEADER_Y_START = A_BLOCK_START_Y
         avatar_y = HEADER_Y_START + (HEADER_H - AVATAR_SIZE) // 2
-        avatar_img = avatar_img.resize((AVATAR_SIZE, AVATAR_SIZE), Image.Resampling.LANCZOS)
-        avatar_img = self._make_circular(avatar_img)
+        avatar_img = self._get_circular_avatar(avatar_img, AVATAR_SIZE)
         canvas.paste(avatar_img, (AVATAR_X, avatar_y), avatar_img)
         
         text_y_start = HEADER_Y_START + (HEADER_H - HEADER_TEXT_HEIGHT) // 2 
@@ -775,6 +1421,10 @@ class ServerMonitor(Star):
             draw.text((x_pos, current_y), data['bat_data']['status_text'], font=content_font_medium, fill=text_block_fill)
             current_y += LINE_SPACING
 
+        for line in extra_lines:
+            draw.text((x_pos, current_y), line, font=content_font_medium, fill=text_block_fill)
+            current_y += LINE_SPACING
+
         info_lines_block1_simple = [
             (f"运行时间: {data['uptime']}", content_font_medium),
             (f"当前时间: {data['current_time']}", content_font_medium),
@@ -791,9 +1441,9 @@ class ServerMonitor(Star):
         current_y += LINE_SPACING
 
         charts = [
-            ("CPU", data['cpu_percent'], data['cpu_image']),
-            ("MEM", data['mem_percent'], data['mem_image']),
-            ("DISK", data['disk_percent'], data['disk_image']),
+            ("CPU", data['cpu_percent']),
+            ("MEM", data['mem_percent']),
+            ("DISK", data['disk_percent']),
         ]
         
         total_B_block_height = num_charts * CHART_SIZE + total_vertical_spacing
@@ -803,7 +1453,7 @@ class ServerMonitor(Star):
         
         chart_center_x = CHART_AREA_RIGHT_START_X + CHART_SIZE // 2 
 
-        for label, value, chart_img in charts:
+        for label, value in charts:
 
             label_y = current_chart_y + LABEL_TOP_PADDING 
             
@@ -817,9 +1467,9 @@ class ServerMonitor(Star):
             chart_y = label_y + label_h + LABEL_CHART_GAP 
             chart_x = chart_center_x - CHART_SIZE // 2 
 
-            resized_chart_img = chart_img.resize((CHART_SIZE, CHART_SIZE), Image.Resampling.LANCZOS) 
+            chart_img = self._create_pie_chart(value, self.bing_dark, self.bing_light, CHART_SIZE)
 
-            canvas.paste(resized_chart_img, (int(chart_x), int(chart_y)), resized_chart_img) 
+            canvas.paste(chart_img, (int(chart_x), int(chart_y)), chart_img) 
             
             current_chart_y = chart_y + CHART_SIZE + gap 
 
@@ -829,80 +1479,475 @@ class ServerMonitor(Star):
     def _draw_status_card(self, data: Dict[str, Any], avatar_img: Image.Image, user_name: str) -> Image.Image:
         canvas = None
         
-        if self.bg_image_path:
+        if self.bg_canvas is not None:
+            canvas = self.bg_canvas.copy()
+        elif self.bg_image_path and self._assets_ready:
             try:
                 if self.blurred_bg_path:
                     canvas = Image.open(str(self.blurred_bg_path)).convert("RGBA")
                 else:
                     bg_path = PLUGIN_DIR / self.bg_image_path
                     canvas = Image.open(str(bg_path)).convert("RGBA")
+                    source_width = canvas.size[0]
+                    fitted_size = self._fit_output_size(canvas.size)
+                    if canvas.size != fitted_size:
+                        canvas = canvas.resize(fitted_size, self.resample)
                     
                     if self.blur_radius > 0:
-                        canvas = canvas.convert("RGB").filter(ImageFilter.GaussianBlur(self.blur_radius)).convert("RGBA")
+                        radius = self._scaled_blur_radius(source_width, fitted_size[0])
+                        canvas = canvas.convert("RGB").filter(ImageFilter.GaussianBlur(radius)).convert("RGBA")
                         
             except Exception:
                 pass
         
         if canvas is None:
-            CARD_WIDTH, CARD_HEIGHT = 900, 350 
-            canvas = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT), self.background_color).convert("RGBA")
+            # 背景尚未准备好或加载失败时，使用同尺寸纯色背景
+            canvas = Image.new('RGB', self.card_size, self.background_color).convert("RGBA")
 
         if self.is_horizontal:
             return self._draw_horizontal_layout(canvas, data, avatar_img, user_name)
         else:
             return self._draw_vertical_layout(canvas, data, avatar_img, user_name)
 
+    def _live_samples(self, count: int) -> List[Dict[str, float]]:
+        # 以 CPU 的采样时间为时间轴，其余指标取每个时间点之前最近的一次采样值
+        cpu_history = list(self.providers.get('cpu').history)[-count:]
+        mem_history = list(self.providers.get('memory').history)
+        disk_history = list(self.providers.get('disk').history)
+        samples = []
+        for ts, cpu_value in cpu_history:
+            samples.append({
+                'time': ts,
+                'cpu': cpu_value,
+                'mem': value_at(mem_history, ts, 0.0),
+                'disk': value_at(disk_history, ts, 0.0),
+            })
+        return samples
+
+    def _draw_live_base(self, samples: List[Dict[str, float]]) -> Tuple[Image.Image, Dict[str, Any]]:
+        LIVE_WIDTH = self.live_width
+        LIVE_HEIGHT = int(LIVE_WIDTH * 0.42)
+        MARGIN = int(LIVE_WIDTH * 0.03)
+
+        if self.bg_canvas is not None:
+            base = ImageOps.fit(self.bg_canvas, (LIVE_WIDTH, LIVE_HEIGHT), self.resample)
+        else:
+            base = Image.new('RGB', (LIVE_WIDTH, LIVE_HEIGHT), self.background_color).convert("RGBA")
+        draw = ImageDraw.Draw(base)
+
+        title_font = self._load_font(self.content_font_path, int(LIVE_HEIGHT * 0.09))
+        label_font = self._load_font(self.content_font_path, int(LIVE_HEIGHT * 0.065))
+
+        draw.text((MARGIN, MARGIN), self.main_title, font=title_font, fill=self.title_font_color)
+        title_h = draw.textbbox((0, 0), self.main_title, font=title_font)[3]
+
+        clock_w = draw.textbbox((0, 0), "00:00:00", font=label_font)[2]
+        clock_h = draw.textbbox((0, 0), "00:00:00", font=label_font)[3]
+        clock_box = (LIVE_WIDTH - MARGIN - clock_w, MARGIN, LIVE_WIDTH - MARGIN, MARGIN + clock_h)
+
+        window_text = f"最近 {len(samples)} 次采样"
+        window_w = draw.textbbox((0, 0), window_text, font=label_font)[2]
+        draw.text((clock_box[0] - MARGIN - window_w, MARGIN), window_text, font=label_font, fill=self.font_color)
+
+        col_w = (LIVE_WIDTH - 2 * MARGIN) // 3
+        label_y = MARGIN + title_h + MARGIN // 2
+        label_h = draw.textbbox((0, 0), "CPU", font=label_font)[3]
+        SPARK_H = int(LIVE_HEIGHT * 0.12)
+        gauge_y = label_y + label_h + MARGIN // 3
+        GAUGE_SIZE = int(min(col_w * 0.6, LIVE_HEIGHT - gauge_y - SPARK_H - 2 * MARGIN))
+        spark_y = gauge_y + GAUGE_SIZE + MARGIN // 2
+
+        columns = []
+        for i, (key, label) in enumerate((('cpu', 'CPU'), ('mem', 'MEM'), ('disk', 'DISK'))):
+            col_x = MARGIN + i * col_w
+            label_w = draw.textbbox((0, 0), label, font=label_font)[2]
+            draw.text((col_x + (col_w - label_w) // 2, label_y), label, font=label_font, fill=self.font_color)
+
+            gauge_x = col_x + (col_w - GAUGE_SIZE) // 2
+            spark_box = (col_x + MARGIN // 2, spark_y, col_x + col_w - MARGIN // 2, spark_y + SPARK_H)
+            points = sparkline_points([s[key] for s in samples], spark_box)
+            # 完整的时间序列作为静态底图，逐帧只高亮到当前采样点
+            draw_sparkline(draw, points, self.bing_light, width=2)
+            columns.append({
+                'key': key,
+                'gauge_box': (gauge_x, gauge_y, gauge_x + GAUGE_SIZE, gauge_y + GAUGE_SIZE),
+                'spark_box': (spark_box[0] - 3, spark_box[1] - 3, spark_box[2] + 4, spark_box[3] + 4),
+                'points': points,
+            })
+
+        layout = {
+            'columns': columns,
+            'clock_box': clock_box,
+            'gauge_size': GAUGE_SIZE,
+            'gauge_font': self._load_font(self.content_font_path, int(GAUGE_SIZE * 0.16)),
+            'label_font': label_font,
+        }
+        return base, layout
+
+    def _iter_live_frames(self, base: Image.Image, layout: Dict[str, Any], samples: List[Dict[str, float]]):
+        canvas = base.copy()
+        draw = ImageDraw.Draw(canvas)
+        gauge_cache: Dict[Tuple[str, float], Image.Image] = {}
+
+        for index, sample in enumerate(samples):
+            # 只恢复并重绘会变化的区域：仪表盘、折线高亮和时间
+            regions = [layout['clock_box']]
+            for column in layout['columns']:
+                regions.append(column['gauge_box'])
+                regions.append(column['spark_box'])
+            for region in regions:
+                canvas.paste(base.crop(region), region[:2])
+
+            clock_text = datetime.datetime.fromtimestamp(sample['time']).strftime('%H:%M:%S')
+            draw.text(layout['clock_box'][:2], clock_text, font=layout['label_font'], fill=self.font_color)
+
+            for column in layout['columns']:
+                value = round(sample[column['key']], 1)
+                gauge = gauge_cache.get((column['key'], value))
+                if gauge is None:
+                    gauge = draw_gauge(layout['gauge_size'], value, self.bing_dark, self.bing_light, layout['gauge_font'])
+                    gauge_cache[(column['key'], value)] = gauge
+                canvas.paste(gauge, column['gauge_box'][:2], gauge)
+                draw_sparkline(draw, column['points'][:index + 1], self.bing_dark, width=2, dot_radius=3)
+
+            yield canvas.copy()
+
+    def _encode_live_frames(self, frames: List[Image.Image]) -> Tuple[bytes, int, float]:
+        """返回 (编码结果, 帧数, 所有编码尝试的总耗时)。"""
+        stride = 1
+        start = time.perf_counter()
+        if not self._live_ms_per_frame and len(frames) > 1:
+            # 首次编码还没有耗时记录：先单独编码一帧估算每帧耗时。完整帧比差分帧编码更慢，估算偏保守
+            encode_animation(frames[:1], self.live_format, self.live_frame_duration, self.live_colors)
+            self._live_ms_per_frame = (time.perf_counter() - start) * 1000
+        if self._live_ms_per_frame:
+            estimate_ms = self._live_ms_per_frame * len(frames)
+            if estimate_ms > self.live_max_encode_ms:
+                stride = math.ceil(estimate_ms / self.live_max_encode_ms)
+        colors = self.live_colors
+        best = None
+
+        while True:
+            selected = frames[::stride]
+            pass_start = time.perf_counter()
+            payload = encode_animation(selected, self.live_format, self.live_frame_duration * stride, colors)
+            pass_ms = (time.perf_counter() - pass_start) * 1000
+            total_ms = (time.perf_counter() - start) * 1000
+            self._live_ms_per_frame = pass_ms / len(selected)
+            if best is None or len(payload) < len(best[0]):
+                best = (payload, len(selected))
+            if len(payload) <= self.live_max_bytes or len(selected) <= 2:
+                return best[0], best[1], total_ms
+
+            # 超出体积预算时抽帧并减少调色板颜色后重新编码；时间预算不足以再编码一次时保留目前最小的结果
+            stride *= 2
+            colors = max(32, colors // 2)
+            next_ms = self._live_ms_per_frame * len(frames[::stride])
+            if total_ms + next_ms > self.live_max_encode_ms:
+                self.context.logger.warning(
+                    f"VisiStat 动态卡片 {len(best[0]) / 1024:.1f}KB 超过体积上限 {self.live_max_bytes / 1024:.0f}KB，"
+                    f"编码已用 {total_ms:.0f}ms，不再重新编码"
+                )
+                return best[0], best[1], total_ms
+
+    def _render_live_card(self, samples: List[Dict[str, float]]) -> str:
+        start = time.perf_counter()
+        base, layout = self._draw_live_base(samples)
+        frames = list(self._iter_live_frames(base, layout, samples))
+        render_ms = (time.perf_counter() - start) * 1000
+
+        payload, frame_count, encode_ms = self._encode_live_frames(frames)
+        if encode_ms > self.live_max_encode_ms:
+            self.context.logger.warning(
+                f"VisiStat 动态卡片编码总耗时 {encode_ms:.0f}ms，超过上限 {self.live_max_encode_ms}ms（{frame_count} 帧）"
+            )
+        file_path = f"status_live.{self.live_format}"
+        # 先写临时文件再替换，并发请求或正在发送的旧文件不会读到写了一半的图片
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+
+        self.context.logger.debug(
+            f"VisiStat live card: {frame_count} frames, render {render_ms:.1f}ms "
+            f"({len(frames) / max(render_ms, 0.001) * 1000:.1f} fps), encode {encode_ms:.1f}ms, "
+            f"{len(payload) / 1024:.1f}KB ({len(payload) / frame_count / 1024:.1f}KB/frame)"
+        )
+        return file_path
+
+    def _draw_themed_card(self, theme_id: str, data: Dict[str, Any], avatar_img: Image.Image, user_name: str) -> Image.Image:
+        plan = self.themes.get(theme_id)
+        return render_plan(plan, data, self._status_fields(data), user_name,
+                           lambda size: self._get_circular_avatar(avatar_img, size))
+
+    def _render_card_file(self, status_data: Dict[str, Any], avatar_img: Image.Image, user_name: str,
+                          theme_id: str = BUILTIN_THEME) -> str:
+        render_start = time.perf_counter()
+        pic = None
+        if theme_id != BUILTIN_THEME:
+            try:
+                pic = self._draw_themed_card(theme_id, status_data, avatar_img, user_name)
+            except ThemeError as e:
+                self.context.logger.warning(f"VisiStat 主题 {theme_id} 不可用，改用内置布局: {e}")
+        if pic is None:
+            pic = self._draw_status_card(status_data, avatar_img, user_name)
+        render_ms = (time.perf_counter() - render_start) * 1000
+        
+        encode_start = time.perf_counter()
+        file_path = "status.png"
+        # 先写临时文件再替换，避免并发渲染时发送出去的是写了一半的图片
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        pic.convert("RGB").save(tmp_path, format="PNG", compress_level=self.png_compress_level)
+        os.replace(tmp_path, file_path)
+        encode_ms = (time.perf_counter() - encode_start) * 1000
+        size = os.path.getsize(file_path)
+        self.context.logger.debug(
+            f"VisiStat card {pic.size[0]}x{pic.size[1]}: render {render_ms:.1f}ms, "
+            f"encode {encode_ms:.1f}ms, {size / 1024:.1f}KB"
+        )
+        self._record_render('full', render_ms + encode_ms, size)
+
+        self._last_card_path = file_path
+        self._last_card_at = time.monotonic()
+        return file_path
+
+    def _draw_compact_card(self, data: Dict[str, Any]) -> Image.Image:
+        WIDTH, HEIGHT = COMPACT_CARD_SIZE
+        MARGIN = 12
+        GAUGE_SIZE = 84
+
+        pic = Image.new('RGB', COMPACT_CARD_SIZE, self.background_color)
+        draw = ImageDraw.Draw(pic)
+        title_font = self._load_font(self.content_font_path, 18)
+        label_font = self._load_font(self.content_font_path, 13)
+        gauge_font = self._load_font(self.content_font_path, 14)
+
+        draw.text((MARGIN, MARGIN), self.main_title, font=title_font, fill=self.title_font_color)
+        time_w = draw.textbbox((0, 0), data['current_time'], font=label_font)[2]
+        draw.text((WIDTH - MARGIN - time_w, MARGIN + 4), data['current_time'], font=label_font, fill=self.font_color)
+
+        label_y = MARGIN + 30
+        gauge_y = label_y + 18
+        for i, (key, label) in enumerate((('cpu_percent', 'CPU'), ('mem_percent', 'MEM'), ('disk_percent', 'DISK'))):
+            col_x = MARGIN + i * (GAUGE_SIZE + MARGIN)
+            label_w = draw.textbbox((0, 0), label, font=label_font)[2]
+            draw.text((col_x + (GAUGE_SIZE - label_w) // 2, label_y), label, font=label_font, fill=self.font_color)
+            # 小尺寸下浅色扇区上的白字难以辨认，加一圈描边
+            gauge = draw_gauge(GAUGE_SIZE, data[key], self.bing_dark, self.bing_light, gauge_font,
+                               stroke_width=1, stroke_color=self.font_color)
+            pic.paste(gauge, (col_x, gauge_y), gauge)
+
+        text_x = MARGIN + 3 * (GAUGE_SIZE + MARGIN)
+        lines = []
+        temp_data_list = self._format_temp_data(data['temp_results'])
+        if temp_data_list:
+            lines.extend(label + value for label, value in temp_data_list)
+        if data['temp_results'].get('power_w') is not None:
+            lines.append(f"功率: {data['temp_results']['power_w']:.1f}W")
+        if self.monitor_battery_status and data['bat_data']['percent'] is not None:
+            lines.append(data['bat_data']['status_text'])
+        lines.append(f"↑{data['net_sent']:.1f}MB ↓{data['net_recv']:.1f}MB")
+        lines.append(f"运行: {data['uptime']}")
+
+        line_h = draw.textbbox((0, 0), "国", font=label_font)[3] + 4
+        max_lines = (HEIGHT - label_y - MARGIN) // line_h
+        wrapped = self._wrap_lines(lines, label_font, draw, WIDTH - MARGIN - text_x)
+        for index, line in enumerate(wrapped[:max_lines]):
+            draw.text((text_x, label_y + index * line_h), line, font=label_font, fill=self.font_color)
+        return pic
+
+    def _render_compact_file(self, status_data: Dict[str, Any]) -> str:
+        start = time.perf_counter()
+        pic = self._draw_compact_card(status_data)
+        file_path = "status_compact.png"
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        pic.quantize(colors=COMPACT_CARD_COLORS, method=Image.Quantize.MEDIANCUT).save(
+            tmp_path, format="PNG", optimize=True)
+        os.replace(tmp_path, file_path)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        size = os.path.getsize(file_path)
+        self.context.logger.debug(f"VisiStat compact card: {elapsed_ms:.1f}ms, {size / 1024:.1f}KB")
+        self._record_render('compact', elapsed_ms, size)
+
+        self._last_card_path = file_path
+        self._last_card_at = time.monotonic()
+        return file_path
+
+    def _record_render(self, mode: str, elapsed_ms: float, size: int):
+        stats = self._mode_stats[mode]
+        stats['count'] += 1
+        if stats['count'] == 1:
+            stats['avg_ms'], stats['avg_bytes'] = elapsed_ms, float(size)
+        else:
+            stats['avg_ms'] = stats['avg_ms'] * 0.8 + elapsed_ms * 0.2
+            stats['avg_bytes'] = stats['avg_bytes'] * 0.8 + size * 0.2
+
+    def _host_load(self) -> float:
+        """返回每核的 1 分钟平均负载；不支持 getloadavg 的系统用 CPU 占用率近似。"""
+        try:
+            return os.getloadavg()[0] / (psutil.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return self.providers.value('cpu', 0.0) / 100.0
+
+    def _choose_render_mode(self, requested: str = '') -> str:
+        requested = (requested or '').strip().lower()
+        requested = RENDER_MODE_ALIASES.get(requested, requested)
+        if requested in RENDER_MODES:
+            return requested
+        if self.render_mode in RENDER_MODES:
+            return self.render_mode
+
+        load = self._host_load()
+        if load >= self.auto_text_load:
+            return 'text'
+        if load >= self.auto_compact_load:
+            return 'compact'
+        return 'full'
+
+    async def _run_render(self, is_admin: bool, func, *args):
+        loop = asyncio.get_running_loop()
+        # 管理员走优先通道，不排队等待渲染槽位
+        if is_admin:
+            return await loop.run_in_executor(None, func, *args)
+        async with self._render_slots:
+            return await loop.run_in_executor(None, func, *args)
+
+    def _chat_key(self, event) -> str:
+        origin = getattr(event, 'unified_msg_origin', None)
+        if origin:
+            return str(origin)
+        try:
+            group_id = event.get_group_id()
+        except Exception:
+            group_id = None
+        if group_id:
+            return f"group:{group_id}"
+        try:
+            return f"user:{event.get_sender_id()}"
+        except Exception:
+            return ''
+
+    def _load_theme_selection(self) -> Dict[str, str]:
+        if self._theme_selection is None:
+            self._theme_selection = {}
+            if self.theme_selection_file.exists():
+                try:
+                    with open(self.theme_selection_file, 'r', encoding='utf-8') as f:
+                        self._theme_selection = json.load(f)
+                except Exception:
+                    pass
+        return self._theme_selection
+
+    def _theme_for(self, event) -> str:
+        theme_id = self._load_theme_selection().get(self._chat_key(event), self.default_theme)
+        if theme_id != BUILTIN_THEME and theme_id not in self.themes:
+            return BUILTIN_THEME
+        return theme_id
+
+    def _set_theme(self, event, theme_id: str):
+        selection = self._load_theme_selection()
+        key = self._chat_key(event)
+        if theme_id == self.default_theme:
+            selection.pop(key, None)
+        else:
+            selection[key] = theme_id
+        try:
+            with open(self.theme_selection_file, 'w', encoding='utf-8') as f:
+                json.dump(selection, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            self.context.logger.warning(f"VisiStat 主题选择保存失败: {e}")
+
+    def _is_admin(self, event) -> bool:
+        try:
+            return bool(event.is_admin())
+        except Exception:
+            return False
+
+    def _check_rate_limit(self, event) -> Tuple[bool, Optional[str], float]:
+        if self.rate_limiter is None:
+            return True, None, 0.0
+        try:
+            user_id = event.get_sender_id()
+        except Exception:
+            user_id = ''
+        try:
+            group_id = event.get_group_id()
+        except Exception:
+            group_id = None
+        return self.rate_limiter.acquire(user_id, group_id, self._is_admin(event))
+
+    def _status_fields(self, data: Dict[str, Any]) -> Dict[str, List[str]]:
+        fields = {
+            'system_info': [f"系统信息: {data['system_info']}"],
+            'temps': [],
+            'power': [],
+            'battery': [],
+            'extra': list(data['extra_lines']),
+            'usage': [f"CPU: {data['cpu_percent']:.1f}% MEM: {data['mem_percent']:.1f}% DISK: {data['disk_percent']:.1f}%"],
+            'net': [f"网络流量: ↑{data['net_sent']:.2f}MB ↓{data['net_recv']:.2f}MB"],
+            'uptime': [f"运行时间: {data['uptime']}"],
+            'time': [f"当前时间: {data['current_time']}"],
+        }
+        temp_data_list = self._format_temp_data(data['temp_results'])
+        if temp_data_list:
+            fields['temps'].append("系统温度: " + " ".join(label + value for label, value in temp_data_list))
+        if data['temp_results'].get('power_w') is not None:
+            fields['power'].append(f"系统功率: {data['temp_results']['power_w']:.1f}W")
+        if self.monitor_battery_status and data['bat_data']['percent'] is not None:
+            fields['battery'].append(data['bat_data']['status_text'])
+        return fields
+
+    def _build_text_summary(self, data: Dict[str, Any]) -> str:
+        fields = self._status_fields(data)
+        lines = [self.main_title]
+        for name in TEXT_SUMMARY_FIELDS:
+            lines.extend(fields[name])
+        return "\n".join(lines)
+
+    def _throttled_result(self, event, scope: Optional[str], retry_after: float):
+        cached_fresh = (
+            self._last_card_path is not None
+            and time.monotonic() - self._last_card_at <= self.cached_card_max_age
+            and os.path.exists(self._last_card_path)
+        )
+        if self.throttle_reply == 'cached' and cached_fresh:
+            self.rate_limiter.counters['cached_replies'] += 1
+            return event.image_result(self._last_card_path)
+
+        # 不重新采样，直接使用后台采样的最新数据生成文字摘要
+        self.rate_limiter.counters['text_replies'] += 1
+        scope_name = THROTTLE_SCOPE_NAMES.get(scope, '')
+        summary = self._build_text_summary(self._collect_status_data())
+        return event.plain_result(f"{summary}\n⏳ 请求过于频繁（{scope_name}），请 {math.ceil(retry_after)} 秒后再试")
+
     @command("状态", alias=["status","info"])
-    async def server_status(self, event):
+    async def server_status(self, event, mode: str = ""):
+        self._schedule_asset_preparation()
+        allowed, scope, retry_after = self._check_rate_limit(event)
+        if not allowed:
+            yield self._throttled_result(event, scope, retry_after)
+            return
+
         user_name = self.fixed_user_name
-        avatar_img = self._load_avatar(300) 
         
         try:
-            mem = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            mem_percent = mem.percent
-            
-            disk_percent = disk.percent
-            
-            cpu_usage = psutil.cpu_percent(interval=0.1)         
-
-            net = psutil.net_io_counters()
-
-            total_bytes_sent = net.bytes_sent
-            total_bytes_recv = net.bytes_recv
-
-            total_mb_sent = total_bytes_sent / (1024 * 1024)
-            total_mb_recv = total_bytes_recv / (1024 * 1024)
-
-            temp_results, bat_data = self._get_sensor_data()
-
-            chart_size_placeholder = 300 
-            cpu_image = self._create_pie_chart(cpu_usage, self.bing_dark, self.bing_light, chart_size_placeholder)
-            mem_image = self._create_pie_chart(mem_percent, self.bing_dark, self.bing_light, chart_size_placeholder)
-            disk_image = self._create_pie_chart(disk_percent, self.bing_dark, self.bing_light, chart_size_placeholder)
-
-
-            status_data = {
-                'cpu_percent': cpu_usage,
-                'mem_percent': mem_percent,
-                'disk_percent': disk_percent,
-                'cpu_image': cpu_image,
-                'mem_image': mem_image,
-                'disk_image': disk_image,
-                'temp_results': temp_results, 
-                'bat_data': bat_data, 
-                'system_info': f"{platform.system()} {platform.release()} ({platform.machine()})" if self.system_info == 'default' or not self.system_info else self.system_info,
-                'uptime': self._get_uptime(),
-                'net_sent': total_mb_sent,
-                'net_recv': total_mb_recv,
-                'current_time': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            }
-            
-            pic = self._draw_status_card(status_data, avatar_img, user_name)
-            
-            file_path = "status.png"
-            pic.save(file_path)
-            
+            await self._refresh_for_request()
+            status_data = self._collect_status_data()
+            render_mode = self._choose_render_mode(mode)
+
+            if render_mode == 'text':
+                start = time.perf_counter()
+                summary = self._build_text_summary(status_data)
+                self._record_render('text', (time.perf_counter() - start) * 1000, len(summary.encode('utf-8')))
+                yield event.plain_result(summary)
+                return
+
+            if render_mode == 'compact':
+                file_path = await self._run_render(self._is_admin(event), self._render_compact_file, status_data)
+            else:
+                avatar_img = self._load_avatar(self._avatar_limit())
+                file_path = await self._run_render(self._is_admin(event), self._render_card_file,
+                                                   status_data, avatar_img, user_name, self._theme_for(event))
             yield event.image_result(file_path)
 
         except Exception as e:
@@ -910,7 +1955,84 @@ class ServerMonitor(Star):
             error_message = f"⚠️ 状态获取失败: {str(e)}\nTraceback: {traceback.format_exc()}"
             yield event.plain_result(error_message)
 
+    @command("动态状态", alias=["live"])
+    async def live_status(self, event):
+        self._schedule_asset_preparation()
+        allowed, scope, retry_after = self._check_rate_limit(event)
+        if not allowed:
+            yield self._throttled_result(event, scope, retry_after)
+            return
+
+        try:
+            await self._refresh_for_request()
+            samples = self._live_samples(self.live_frames)
+            if len(samples) < 2:
+                yield event.plain_result("⚠️ 采样数据不足，请稍后再试（动态卡片需要开启后台采样）")
+                return
+
+            file_path = await self._run_render(self._is_admin(event), self._render_live_card, samples)
+            yield event.image_result(file_path)
+
+        except Exception as e:
+            import traceback
+            error_message = f"⚠️ 状态获取失败: {str(e)}\nTraceback: {traceback.format_exc()}"
+            yield event.plain_result(error_message)
+
+    @command("主题", alias=["theme"])
+    async def select_theme(self, event, name: str = ""):
+        name = name.strip()
+        current = self._theme_for(event)
+        if not name:
+            names = [BUILTIN_THEME] + [n for n in self.themes.names() if n != BUILTIN_THEME]
+            listing = "，".join(f"{n}（当前）" if n == current else n for n in names)
+            yield event.plain_result(f"可用主题: {listing}\n使用 /主题 <名称> 为当前会话切换主题")
+            return
+
+        if name != BUILTIN_THEME:
+            if name not in self.themes.names():
+                yield event.plain_result(f"⚠️ 主题 {name} 不存在")
+                return
+            try:
+                # 切换时就编译主题，之后的状态请求直接复用缓存的渲染计划
+                loop = asyncio.get_running_loop()
+                plan = await loop.run_in_executor(None, self.themes.get, name)
+            except ThemeError as e:
+                yield event.plain_result(f"⚠️ 主题 {name} 加载失败: {e}")
+                return
+            display_name = plan.name
+        else:
+            display_name = "经典"
+        self._set_theme(event, name)
+        yield event.plain_result(f"已将当前会话的主题切换为 {name}（{display_name}）")
+
+    @command("状态统计", alias=["status_stats"])
+    async def status_stats(self, event):
+        lines = ["VisiStat 请求统计"]
+        if self.rate_limiter is None:
+            lines.append("限流: 未启用")
+        else:
+            c = self.rate_limiter.counters
+            lines.append(f"已渲染: {c['served']}（管理员优先: {c['priority']}）")
+            lines.append(f"被限流: {c['throttled']}（用户 {c['throttled_user']} / 群组 {c['throttled_group']} / 全局 {c['throttled_global']}）")
+            lines.append(f"限流回复: 缓存图片 {c['cached_replies']} / 文字 {c['text_replies']}")
+        lines.append(f"渲染模式（当前负载 {self._host_load():.2f}/核）:")
+        for mode in RENDER_MODES:
+            stats = self._mode_stats[mode]
+            if stats['count']:
+                lines.append(f"  {mode}: {stats['count']} 次，平均 {stats['avg_ms']:.1f}ms，{stats['avg_bytes'] / 1024:.1f}KB")
+        lines.append("数据源采样耗时:")
+        for provider in self.providers.enabled():
+            stats = provider.stats()
+            avg = f"{stats['avg_ms']:.2f}ms" if stats['avg_ms'] is not None else "-"
+            lines.append(f"  {provider.name}: 平均 {avg}，超时 {stats['timeouts']}，错误 {stats['errors']}")
+        yield event.plain_result("\n".join(lines))
+
     async def terminate(self):
+        if self._trends_loaded:
+            with self._trends_lock:
+                self._save_trends(time.time())
+        if self._asset_task and not self._asset_task.done():
+            self._asset_task.cancel()
         if self._monitor_task and not self._monitor_task.cancelled():
             self._monitor_task.cancel()
         await super().terminate()
\ No newline at end of file
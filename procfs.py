@@ -0,0 +1,134 @@
+import glob
+import os
+from typing import Dict, Iterable, Optional
+
+
+_DIGITS = b'0123456789'
+_SPACES = b' \t'
+
+
+class KeyValueReader:
+    """反复读取 /proc、sysfs 中 “键 值” 格式文件的轻量解析器。
+
+    文件内容读入复用的 bytearray，只查找需要的键并就地解析其后的整数，
+    不会像 ``read().split()`` 那样为整个文件创建字符串列表。``value_index`` 表示取键之后的第几个数字
+    （arcstats 的每行为 “名称 类型 数据”，数据是第 2 个数字）。
+    """
+
+    def __init__(self, path: str, keys: Iterable[str], value_index: int = 0, buffer_size: int = 16384):
+        self.path = path
+        self.value_index = value_index
+        self._keys = [(key, b'\n' + key.encode()) for key in keys]
+        self._buffer = bytearray(buffer_size)
+        self._file = None
+
+    def _read(self) -> int:
+        if self._file is None:
+            self._file = open(self.path, 'rb', buffering=0)
+        else:
+            self._file.seek(0)
+        # /proc 文件每次 read() 最多返回一页左右的内容，需要持续读取直到返回 0 才算读完整个文件
+        size = 0
+        while True:
+            if size == len(self._buffer):
+                self._buffer.extend(bytes(len(self._buffer)))
+            with memoryview(self._buffer) as view:
+                count = self._file.readinto(view[size:])
+            if not count:
+                return size
+            size += count
+
+    def read(self) -> Dict[str, Optional[int]]:
+        try:
+            size = self._read()
+        except OSError:
+            self.close()
+            return {key: None for key, _ in self._keys}
+
+        buf = self._buffer
+        values = {}
+        for key, needle in self._keys:
+            # 键必须位于行首，并紧跟分隔符，避免 “size” 匹配到 “c_size”
+            if buf.startswith(needle[1:]):
+                pos = 0
+            else:
+                pos = buf.find(needle, 0, size)
+                if pos >= 0:
+                    pos += 1
+            end = pos + len(needle) - 1
+            if pos < 0 or end >= size or buf[end] not in b': \t=':
+                values[key] = None
+                continue
+            values[key] = _parse_int(buf, end, size, self.value_index)
+        return values
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _parse_int(buf: bytearray, pos: int, size: int, skip: int) -> Optional[int]:
+    while pos < size and buf[pos] != 10:
+        while pos < size and buf[pos] not in _DIGITS and buf[pos] != 10:
+            pos += 1
+        if pos >= size or buf[pos] == 10:
+            return None
+        value = 0
+        while pos < size and buf[pos] in _DIGITS:
+            value = value * 10 + buf[pos] - 48
+            pos += 1
+        if skip == 0:
+            return value
+        skip -= 1
+    return None
+
+
+def read_int_file(path: str) -> Optional[int]:
+    try:
+        with open(path, 'rb') as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_pressure(path: str = '/proc/pressure/memory') -> Optional[Dict[str, float]]:
+    """读取 PSI 的 avg10 值（百分比），文件很小直接按行解析。"""
+    try:
+        with open(path, 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    pressure = {}
+    for line in lines:
+        kind, _, fields = line.partition(' ')
+        for field in fields.split():
+            if field.startswith('avg10='):
+                pressure[kind] = float(field[6:])
+    return pressure or None
+
+
+def read_ksm(sysfs_root: str = '/sys') -> Optional[Dict[str, int]]:
+    base = os.path.join(sysfs_root, 'kernel', 'mm', 'ksm')
+    sharing = read_int_file(os.path.join(base, 'pages_sharing'))
+    if sharing is None:
+        return None
+    return {
+        'pages_shared': read_int_file(os.path.join(base, 'pages_shared')) or 0,
+        'pages_sharing': sharing,
+    }
+
+
+def read_amdgpu(sysfs_root: str = '/sys') -> Dict[str, Dict[str, Optional[int]]]:
+    gpus = {}
+    for device in sorted(glob.glob(os.path.join(sysfs_root, 'class', 'drm', 'card[0-9]*', 'device'))):
+        busy = read_int_file(os.path.join(device, 'gpu_busy_percent'))
+        if busy is None:
+            continue
+        card = os.path.basename(os.path.dirname(device))
+        gpus[card] = {
+            'busy_percent': busy,
+            'vram_used': read_int_file(os.path.join(device, 'mem_info_vram_used')),
+            'vram_total': read_int_file(os.path.join(device, 'mem_info_vram_total')),
+        }
+    return gpus
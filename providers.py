@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+COST_CHEAP = "cheap"
+COST_MODERATE = "moderate"
+COST_EXPENSIVE = "expensive"
+
+# 各成本等级的默认采样超时（秒），超时后沿用上一次的采样值
+DEFAULT_TIMEOUTS = {
+    COST_CHEAP: 0.5,
+    COST_MODERATE: 2.0,
+    COST_EXPENSIVE: 5.0,
+}
+
+# 后台采样时检查数据源注册/启用状态变化的间隔（秒）
+REGISTRY_POLL_INTERVAL = 1.0
+
+
+class MetricProvider:
+    """一个独立采样的数据源。
+
+    ``sample`` 在线程池中执行并返回任意值，``formatter`` 把该值转换为卡片/文本中显示的行。
+    """
+
+    def __init__(self, name: str, sample: Callable[[], Any], interval: float = 5.0,
+                 cost: str = COST_CHEAP, formatter: Optional[Callable[[Any], List[str]]] = None,
+                 timeout: Optional[float] = None, enabled: bool = True, history_size: int = 120):
+        self.name = name
+        self.sample = sample
+        self.interval = interval
+        self.cost = cost
+        self.formatter = formatter
+        self.timeout = timeout if timeout is not None else DEFAULT_TIMEOUTS.get(cost, 2.0)
+        self.enabled = enabled
+
+        self.value: Any = None
+        # (time.time(), value) 的最近采样记录，供动态卡片等需要时间序列的功能使用
+        self.history: deque = deque(maxlen=history_size)
+        self.last_sample_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+        self.avg_duration_ms: Optional[float] = None
+        self.samples = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._pending: Optional[asyncio.Future] = None
+
+    def is_stale(self, now: float) -> bool:
+        return self.last_sample_at is None or now - self.last_sample_at >= self.interval
+
+    def format(self, value: Any = None) -> List[str]:
+        value = self.value if value is None else value
+        if self.formatter is None or value is None:
+            return []
+        return self.formatter(value)
+
+    def _run_sample(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return self.sample()
+        finally:
+            self._record_duration((time.perf_counter() - start) * 1000)
+
+    def _record_duration(self, duration_ms: float):
+        self.last_duration_ms = duration_ms
+        if self.avg_duration_ms is None:
+            self.avg_duration_ms = duration_ms
+        else:
+            self.avg_duration_ms = self.avg_duration_ms * 0.8 + duration_ms * 0.2
+
+    def _on_sample_done(self, future: asyncio.Future):
+        self._pending = None
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.errors += 1
+            self.last_error = str(error)
+            # 只有超时才沿用旧值；采样出错（文件被删除、传感器读取失败）时显示 N/A，而不是一直显示过期读数
+            self.value = None
+            return
+        self.value = future.result()
+        self.last_sample_at = time.monotonic()
+        self.samples += 1
+        if self.value is not None:
+            self.history.append((time.time(), self.value))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'interval': self.interval,
+            'cost': self.cost,
+            'samples': self.samples,
+            'last_ms': self.last_duration_ms,
+            'avg_ms': self.avg_duration_ms,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+class ProviderRegistry:
+    """按各自的采样间隔调度 MetricProvider，并行采样且互不阻塞。
+
+    后台采样时每个数据源有自己的任务，按自己的 ``interval`` 采样，慢的数据源不会拖慢其他数据源的采样节奏。
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, MetricProvider] = {}
+
+    def register(self, provider: MetricProvider) -> MetricProvider:
+        self._providers[provider.name] = provider
+        return provider
+
+    def unregister(self, name: str):
+        self._providers.pop(name, None)
+
+    def get(self, name: str) -> Optional[MetricProvider]:
+        return self._providers.get(name)
+
+    def __iter__(self):
+        return iter(list(self._providers.values()))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._providers
+
+    def enabled(self) -> List[MetricProvider]:
+        return [p for p in self._providers.values() if p.enabled]
+
+    def value(self, name: str, default: Any = None) -> Any:
+        provider = self._providers.get(name)
+        if provider is None or provider.value is None:
+            return default
+        return provider.value
+
+    def values(self) -> Dict[str, Any]:
+        return {p.name: p.value for p in self.enabled()}
+
+    async def refresh(self, names: Optional[Iterable[str]] = None, force: bool = False,
+                      exclude_costs: Iterable[str] = ()):
+        now = time.monotonic()
+        if names is None:
+            providers = self.enabled()
+        else:
+            providers = [self._providers[n] for n in names if n in self._providers and self._providers[n].enabled]
+        excluded = set(exclude_costs)
+        due = [p for p in providers if (force or p.is_stale(now)) and p.cost not in excluded]
+        if due:
+            await asyncio.gather(*(self._sample(p) for p in due))
+
+    async def _sample(self, provider: MetricProvider):
+        # 上一次采样仍未结束（例如卡住的传感器读取）时不重复派发
+        if provider._pending is not None:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, provider._run_sample)
+        provider._pending = future
+        future.add_done_callback(provider._on_sample_done)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), provider.timeout)
+        except asyncio.TimeoutError:
+            provider.timeouts += 1
+        except Exception:
+            pass
+
+    async def _run_provider(self, provider: MetricProvider, min_sleep: float, max_sleep: float):
+        while provider.enabled:
+            started = time.monotonic()
+            await self._sample(provider)
+            # 下一次采样按派发时间对齐，采样本身的耗时不会累加到间隔上
+            delay = provider.interval - (time.monotonic() - started)
+            await asyncio.sleep(min(max_sleep, max(min_sleep, delay)))
+
+    async def run(self, min_sleep: float = 0.5, max_sleep: float = 60.0):
+        tasks: Dict[str, Tuple[MetricProvider, asyncio.Task]] = {}
+        try:
+            while True:
+                for name, (provider, task) in list(tasks.items()):
+                    if self._providers.get(name) is not provider or task.done():
+                        task.cancel()
+                        del tasks[name]
+                for provider in self.enabled():
+                    if provider.name not in tasks:
+                        task = asyncio.create_task(self._run_provider(provider, min_sleep, max_sleep))
+                        tasks[provider.name] = (provider, task)
+                await asyncio.sleep(REGISTRY_POLL_INTERVAL)
+        finally:
+            for _, task in tasks.values():
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {p.name: p.stats() for p in self._providers.values()}
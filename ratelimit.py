@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+SCOPE_USER = "user"
+SCOPE_GROUP = "group"
+SCOPE_GLOBAL = "global"
+
+
+class TokenBucket:
+    __slots__ = ('capacity', 'refill_per_sec', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, refill_per_sec: float, now: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+            self.updated = now
+
+    def can_consume(self, now: float, cost: float = 1.0) -> bool:
+        self._refill(now)
+        return self.tokens >= cost
+
+    def consume(self, now: float, cost: float = 1.0):
+        self._refill(now)
+        self.tokens -= cost
+
+    def retry_after(self, now: float, cost: float = 1.0) -> float:
+        self._refill(now)
+        if self.tokens >= cost or self.refill_per_sec <= 0:
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_sec
+
+
+class RateLimiter:
+    """按用户、群组和全局三级令牌桶限制状态卡片的渲染频率。
+
+    速率以“每分钟补充的令牌数”配置，burst 为桶容量；速率或容量为 0 表示该级别不限制。
+    请求必须在所有级别都有令牌才会放行，且只有放行时才扣除令牌。
+    """
+
+    def __init__(self, user_rate: float = 3, user_burst: float = 3,
+                 group_rate: float = 6, group_burst: float = 6,
+                 global_rate: float = 20, global_burst: float = 10, max_buckets: int = 1024):
+        self._limits = {
+            SCOPE_USER: (user_burst, user_rate / 60.0),
+            SCOPE_GROUP: (group_burst, group_rate / 60.0),
+            SCOPE_GLOBAL: (global_burst, global_rate / 60.0),
+        }
+        self._buckets: Dict[str, "OrderedDict[str, TokenBucket]"] = {
+            SCOPE_USER: OrderedDict(),
+            SCOPE_GROUP: OrderedDict(),
+            SCOPE_GLOBAL: OrderedDict(),
+        }
+        self.max_buckets = max_buckets
+        self.counters = {
+            'served': 0,
+            'priority': 0,
+            'throttled': 0,
+            'throttled_user': 0,
+            'throttled_group': 0,
+            'throttled_global': 0,
+            'cached_replies': 0,
+            'text_replies': 0,
+        }
+
+    def _bucket(self, scope: str, key: str, now: float) -> Optional[TokenBucket]:
+        capacity, refill = self._limits[scope]
+        if capacity <= 0 or refill <= 0:
+            return None
+        buckets = self._buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, refill, now)
+            buckets[key] = bucket
+            # 长时间不活跃的用户桶早已补满，淘汰它们不会改变限流结果
+            while len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def acquire(self, user_id: str, group_id: Optional[str] = None, is_admin: bool = False,
+                cost: float = 1.0) -> Tuple[bool, Optional[str], float]:
+        """返回 (是否放行, 被限流的级别, 建议重试等待秒数)。管理员走优先通道，不受限流。"""
+        if is_admin:
+            self.counters['priority'] += 1
+            self.counters['served'] += 1
+            return True, None, 0.0
+
+        now = time.monotonic()
+        scopes = [(SCOPE_USER, str(user_id))]
+        if group_id:
+            scopes.append((SCOPE_GROUP, str(group_id)))
+        scopes.append((SCOPE_GLOBAL, SCOPE_GLOBAL))
+
+        buckets = []
+        for scope, key in scopes:
+            bucket = self._bucket(scope, key, now)
+            if bucket is None:
+                continue
+            if not bucket.can_consume(now, cost):
+                self.counters['throttled'] += 1
+                self.counters[f'throttled_{scope}'] += 1
+                return False, scope, bucket.retry_after(now, cost)
+            buckets.append(bucket)
+
+        for bucket in buckets:
+            bucket.consume(now, cost)
+        self.counters['served'] += 1
+        return True, None, 0.0
@@ -0,0 +1,359 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from .animation import GAUGE_SUPERSAMPLE, draw_gauge
+
+
+# 内置主题：沿用原有的横屏/竖屏布局，由插件配置驱动，不对应主题文件
+BUILTIN_THEME = 'classic'
+
+THEME_SUFFIXES = ('.json', '.yaml', '.yml')
+
+GAUGE_KEYS = (('cpu_percent', 'CPU'), ('mem_percent', 'MEM'), ('disk_percent', 'DISK'))
+GAUGE_STYLES = ('pie', 'ring', 'bar')
+
+DEFAULT_COLORS = {
+    'text': '#1a202c',
+    'title': '#1a202c',
+    'gauge_fill': '#4c51bf',
+    'gauge_track': '#a8a8a8',
+    'gauge_text': '#ffffff',
+}
+
+yaml = None
+
+
+def _get_yaml():
+    global yaml
+    if yaml is None:
+        try:
+            import yaml as _yaml
+            yaml = _yaml
+        except ImportError:
+            yaml = None
+    return yaml
+
+
+class ThemeError(ValueError):
+    pass
+
+
+def load_theme_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.suffix == '.json':
+                theme = json.load(f)
+            else:
+                yaml_module = _get_yaml()
+                if yaml_module is None:
+                    raise ThemeError(f"读取 {path.name} 需要安装 PyYAML")
+                theme = yaml_module.safe_load(f)
+    except (OSError, ValueError) as e:
+        if isinstance(e, ThemeError):
+            raise
+        raise ThemeError(f"主题文件 {path.name} 读取失败: {e}") from e
+    if not isinstance(theme, dict) or not isinstance(theme.get('blocks'), list):
+        raise ThemeError(f"主题文件 {path.name} 缺少 blocks 列表")
+    return theme
+
+
+def draw_ring_gauge(size: int, value: float, color: str, track_color: str, font: ImageFont.FreeTypeFont,
+                    text_color: str, thickness: float = 0.16) -> Image.Image:
+    big = size * GAUGE_SUPERSAMPLE
+    width = max(1, int(big * thickness))
+    img = Image.new('RGBA', (big, big), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    box = (0, 0, big - 1, big - 1)
+    draw.arc(box, 0, 360, fill=track_color, width=width)
+    value = max(0.0, min(100.0, value))
+    if value > 0:
+        draw.arc(box, -90, -90 + 360 * value / 100, fill=color, width=width)
+    img = img.resize((size, size), Image.Resampling.LANCZOS)
+
+    draw = ImageDraw.Draw(img)
+    text = f"{value:.1f}%"
+    bbox = draw.textbbox((0, 0), text, font=font)
+    draw.text(((size - (bbox[2] - bbox[0])) / 2 - bbox[0], (size - (bbox[3] - bbox[1])) / 2 - bbox[1]),
+              text, font=font, fill=text_color)
+    return img
+
+
+def draw_bar_gauge(width: int, height: int, value: float, color: str, track_color: str,
+                   font: ImageFont.FreeTypeFont, text_color: str) -> Image.Image:
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    radius = height // 2
+    draw.rounded_rectangle((0, 0, width - 1, height - 1), radius=radius, fill=track_color)
+    value = max(0.0, min(100.0, value))
+    fill_w = int(width * value / 100)
+    if fill_w > 0:
+        draw.rounded_rectangle((0, 0, max(fill_w, height) - 1, height - 1), radius=radius, fill=color)
+    text = f"{value:.1f}%"
+    bbox = draw.textbbox((0, 0), text, font=font)
+    draw.text((width - radius - (bbox[2] - bbox[0]) - bbox[0], (height - (bbox[3] - bbox[1])) / 2 - bbox[1]),
+              text, font=font, fill=text_color)
+    return img
+
+
+def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    if not text:
+        return [""]
+    lines = []
+    current = ""
+    for segment in re.findall(r'[\S\u4e00-\u9fa5]+|\s+', text):
+        candidate = (current + segment).strip()
+        if font.getlength(candidate) <= max_width or not current.strip():
+            current += segment
+        else:
+            lines.append(current.rstrip())
+            current = segment.lstrip()
+    if current.strip():
+        lines.append(current.rstrip())
+    return lines
+
+
+class RenderPlan:
+    """编译后的主题：静态元素已绘制进底图，动态元素只保留预先解析的字体和坐标。"""
+
+    __slots__ = ('theme_id', 'name', 'size', 'base', 'ops')
+
+    def __init__(self, theme_id: str, name: str, size: Tuple[int, int], base: Image.Image, ops: List[tuple]):
+        self.theme_id = theme_id
+        self.name = name
+        self.size = size
+        self.base = base
+        self.ops = ops
+
+
+def _line_height(font: ImageFont.FreeTypeFont, spacing: float) -> int:
+    bbox = font.getbbox("国Ag")
+    return int((bbox[3] - bbox[1]) * spacing)
+
+
+def _build_background(theme: Dict[str, Any], size: Tuple[int, int], plugin_dir: Path) -> Image.Image:
+    background = theme.get('background', {})
+    base = Image.new('RGBA', size, background.get('color', '#ffffff'))
+    image_path = background.get('image')
+    if image_path:
+        try:
+            with Image.open(str(plugin_dir / image_path)) as img:
+                fitted = ImageOps.fit(img.convert('RGB'), size, Image.Resampling.LANCZOS)
+            blur = background.get('blur', 0)
+            if blur > 0:
+                fitted = fitted.filter(ImageFilter.GaussianBlur(blur))
+            base = fitted.convert('RGBA')
+        except OSError as e:
+            raise ThemeError(f"主题背景 {image_path} 加载失败: {e}") from e
+    overlay = background.get('overlay')
+    if overlay:
+        base = Image.alpha_composite(base, Image.new('RGBA', size, overlay))
+    return base
+
+
+def compile_theme(theme_id: str, theme: Dict[str, Any], plugin_dir: Path,
+                  load_font: Callable[[str, int], ImageFont.FreeTypeFont],
+                  context: Dict[str, str]) -> RenderPlan:
+    """把主题定义编译为 RenderPlan。``context`` 提供标题等在运行期间不变的文本。"""
+    try:
+        size = (int(theme['size'][0]), int(theme['size'][1]))
+    except (KeyError, TypeError, ValueError, IndexError):
+        raise ThemeError(f"主题 {theme_id} 的 size 必须为 [宽, 高]")
+    font_path = theme.get('font', context.get('font_path', ''))
+    colors = dict(DEFAULT_COLORS, **theme.get('colors', {}))
+
+    base = _build_background(theme, size, plugin_dir)
+    draw = ImageDraw.Draw(base)
+    ops = []
+
+    for index, block in enumerate(theme.get('blocks', [])):
+        try:
+            kind = block.get('type')
+            x, y = block.get('x', 0), block.get('y', 0)
+            color = block.get('color')
+            if color:
+                # 文字颜色在渲染时才使用，这里先解析一次，写错时在编译阶段就报告
+                ImageColor.getrgb(color)
+
+            if kind == 'rect':
+                # 在独立图层上绘制再合成，半透明填充色才会与背景混合而不是直接覆盖
+                layer = Image.new('RGBA', size, (0, 0, 0, 0))
+                ImageDraw.Draw(layer).rounded_rectangle(
+                    tuple(block['box']), radius=block.get('radius', 0),
+                    fill=block.get('fill'), outline=block.get('outline'), width=block.get('width', 1))
+                base = Image.alpha_composite(base, layer)
+                draw = ImageDraw.Draw(base)
+            elif kind == 'text' or kind == 'title':
+                text = block.get('text', context.get('main_title', '')) if kind == 'title' else block.get('text', '')
+                font = load_font(font_path, block.get('font_size', 24))
+                draw.text((x, y), text, font=font, fill=color or colors['title' if kind == 'title' else 'text'])
+            elif kind == 'avatar':
+                ops.append(('avatar', (x, y), block.get('size', 96)))
+            elif kind == 'user_name':
+                ops.append(('user_name', (x, y), load_font(font_path, block.get('font_size', 24)), color or colors['title']))
+            elif kind == 'lines':
+                font = load_font(font_path, block.get('font_size', 20))
+                ops.append(('lines', (x, y), font, color or colors['text'], block.get('width', size[0] - x),
+                            _line_height(font, block.get('line_spacing', 1.4)), block.get('max_lines', 0),
+                            tuple(block.get('fields', ()))))
+            elif kind == 'gauges':
+                ops.extend(_compile_gauges(block, draw, font_path, load_font, colors))
+            else:
+                raise ThemeError(f"主题 {theme_id} 包含未知的块类型: {kind}")
+        except ThemeError:
+            raise
+        except (KeyError, TypeError, ValueError, IndexError, AttributeError) as e:
+            # 缺少 box 等必填字段、颜色写错时指出是哪个块，而不是抛出 PIL 的原始异常
+            raise ThemeError(f"主题 {theme_id} 的 blocks[{index}] 无效: {e!r}") from e
+
+    return RenderPlan(theme_id, theme.get('name', theme_id), size, base, ops)
+
+
+def _compile_gauges(block: Dict[str, Any], draw: ImageDraw.ImageDraw, font_path: str,
+                    load_font: Callable[[str, int], ImageFont.FreeTypeFont], colors: Dict[str, str]) -> List[tuple]:
+    style = block.get('style', 'pie')
+    if style not in GAUGE_STYLES:
+        raise ThemeError(f"未知的仪表盘样式: {style}")
+    x, y = block.get('x', 0), block.get('y', 0)
+    gauge_w = block.get('size', 110)
+    gauge_h = block.get('height', 28) if style == 'bar' else gauge_w
+    gap = block.get('gap', 12)
+    column = block.get('direction', 'row') == 'column'
+    keys = [k for k in GAUGE_KEYS if k[0] in block.get('metrics', [k[0] for k in GAUGE_KEYS])]
+
+    label_font = load_font(font_path, block.get('label_size', 20))
+    value_font = load_font(font_path, block.get('font_size', max(10, int(gauge_h * (0.6 if style == 'bar' else 0.16)))))
+    label_color = block.get('label_color', colors['text'])
+    fill = block.get('fill', colors['gauge_fill'])
+    track = block.get('track', colors['gauge_track'])
+    text_color = block.get('text_color', colors['gauge_text'])
+
+    show_labels = block.get('labels', True)
+    label_w = max(draw.textbbox((0, 0), label, font=label_font)[2] for _, label in keys) if show_labels else 0
+    label_h = draw.textbbox((0, 0), "CPU", font=label_font)[3] if show_labels else 0
+
+    ops = []
+    for index, (key, label) in enumerate(keys):
+        if column:
+            slot_x, slot_y = x, y + index * (gauge_h + gap)
+            if show_labels:
+                draw.text((slot_x, slot_y + (gauge_h - label_h) / 2), label, font=label_font, fill=label_color)
+            gauge_pos = (slot_x + (label_w + gap if show_labels else 0), slot_y)
+        else:
+            slot_x, slot_y = x + index * (gauge_w + gap), y
+            if show_labels:
+                text_w = draw.textbbox((0, 0), label, font=label_font)[2]
+                draw.text((slot_x + (gauge_w - text_w) / 2, slot_y), label, font=label_font, fill=label_color)
+            gauge_pos = (slot_x, slot_y + (label_h + gap // 2 if show_labels else 0))
+        ops.append(('gauge', gauge_pos, key, style, gauge_w, gauge_h, value_font, fill, track, text_color))
+    return ops
+
+
+def render_plan(plan: RenderPlan, data: Dict[str, Any], fields: Dict[str, List[str]], user_name: str,
+                avatar: Callable[[int], Image.Image]) -> Image.Image:
+    canvas = plan.base.copy()
+    draw = ImageDraw.Draw(canvas)
+    for op in plan.ops:
+        kind = op[0]
+        if kind == 'avatar':
+            _, pos, size = op
+            circular = avatar(size)
+            canvas.paste(circular, pos, circular)
+        elif kind == 'user_name':
+            _, pos, font, color = op
+            draw.text(pos, user_name, font=font, fill=color)
+        elif kind == 'lines':
+            _, (x, y), font, color, width, line_h, max_lines, names = op
+            lines = []
+            for name in names:
+                for line in fields.get(name, ()):
+                    lines.extend(wrap_text(line, font, width))
+            if max_lines:
+                lines = lines[:max_lines]
+            for index, line in enumerate(lines):
+                draw.text((x, y + index * line_h), line, font=font, fill=color)
+        elif kind == 'gauge':
+            _, pos, key, style, width, height, font, fill, track, text_color = op
+            value = data.get(key, 0.0)
+            if style == 'ring':
+                gauge = draw_ring_gauge(width, value, fill, track, font, text_color)
+            elif style == 'bar':
+                gauge = draw_bar_gauge(width, height, value, fill, track, font, text_color)
+            else:
+                gauge = draw_gauge(width, value, fill, track, font, text_color)
+            canvas.paste(gauge, (int(pos[0]), int(pos[1])), gauge)
+    return canvas
+
+
+class ThemeRegistry:
+    """按主题文件名（不含扩展名）查找主题，并缓存编译好的 RenderPlan。
+
+    每次取用时检查主题文件与背景图的修改时间，文件变化后重新编译；其余情况直接复用缓存。
+    """
+
+    def __init__(self, theme_dir: Path, plugin_dir: Path,
+                 load_font: Callable[[str, int], ImageFont.FreeTypeFont], context: Dict[str, str]):
+        self.theme_dir = theme_dir
+        self.plugin_dir = plugin_dir
+        self.load_font = load_font
+        self.context = context
+        self._plans: Dict[str, Tuple[tuple, RenderPlan]] = {}
+        self._lock = threading.Lock()
+        self.compiles = 0
+
+    def _path(self, theme_id: str) -> Optional[Path]:
+        # 只接受主题目录中实际存在的主题名，"../xxx" 之类的名称不会读到目录之外的文件
+        if theme_id not in self.names():
+            return None
+        for suffix in THEME_SUFFIXES:
+            path = self.theme_dir / f"{theme_id}{suffix}"
+            if path.is_file():
+                return path
+        return None
+
+    def names(self) -> List[str]:
+        try:
+            entries = os.listdir(self.theme_dir)
+        except OSError:
+            return []
+        return sorted({os.path.splitext(e)[0] for e in entries if e.endswith(THEME_SUFFIXES)})
+
+    def __contains__(self, theme_id: str) -> bool:
+        return self._path(theme_id) is not None
+
+    def _signature(self, paths: List[Path]) -> tuple:
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def get(self, theme_id: str) -> RenderPlan:
+        path = self._path(theme_id)
+        if path is None:
+            raise ThemeError(f"主题 {theme_id} 不存在")
+        with self._lock:
+            cached = self._plans.get(theme_id)
+            if cached is not None:
+                signature, plan = cached
+                if self._signature([Path(p) for p, _, _ in signature]) == signature:
+                    return plan
+
+            # 先取签名再读取文件，编译期间文件再次变化时下次取用会重新编译
+            signature = self._signature([path])
+            theme = load_theme_file(path)
+            image = theme.get('background', {}).get('image')
+            if image:
+                signature += self._signature([self.plugin_dir / image])
+            plan = compile_theme(theme_id, theme, self.plugin_dir, self.load_font, self.context)
+            self._plans[theme_id] = (signature, plan)
+            self.compiles += 1
+            return plan
@@ -0,0 +1,205 @@
+import datetime
+import json
+import os
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$', re.IGNORECASE)
+_DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# 每个滚动窗口划分的桶数，决定内存占用、检查点大小以及窗口边界的时间精度
+WINDOW_BUCKETS = 60
+
+# 电量按天保存，保留足够计算本月用电的天数
+ENERGY_KEEP_DAYS = 62
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """把 '30m'、'1h'、'7d' 这样的时长解析为秒数，无法解析时返回 None。"""
+    m = _DURATION_RE.match(text)
+    if not m:
+        return None
+    seconds = int(float(m.group(1)) * _DURATION_UNITS[m.group(2).lower()])
+    return seconds if seconds > 0 else None
+
+
+class RollingStats:
+    """固定时间窗口内的最小/最大/平均值，每次更新与查询均摊 O(1)。
+
+    采样先合并进按 ``resolution`` 对齐的时间桶；桶关闭后进入单调队列（最小值队列递增、最大值队列递减），
+    过期桶从队首弹出，总和与计数同步扣除。检查点只需保存这些桶，而不是全部原始采样。
+    """
+
+    def __init__(self, window: float, resolution: Optional[float] = None):
+        self.window = window
+        self.resolution = resolution or max(1.0, window / WINDOW_BUCKETS)
+        # 每个桶为 [起始时间, 最小值, 最大值, 总和, 计数]
+        self._buckets: deque = deque()
+        self._min_queue: deque = deque()
+        self._max_queue: deque = deque()
+        self._open: Optional[List[float]] = None
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, ts: float, value: float):
+        start = ts - ts % self.resolution
+        if self._open is not None and start != self._open[0]:
+            if start < self._open[0]:
+                # 系统时间回拨：把采样并入当前桶，避免破坏桶的时间顺序
+                start = self._open[0]
+            else:
+                self._close()
+        if self._open is None:
+            self._open = [start, value, value, 0.0, 0]
+        bucket = self._open
+        bucket[1] = min(bucket[1], value)
+        bucket[2] = max(bucket[2], value)
+        bucket[3] += value
+        bucket[4] += 1
+        self._expire(ts)
+
+    def _close(self):
+        self._push(self._open)
+        self._open = None
+
+    def _push(self, bucket: List[float]):
+        self._buckets.append(bucket)
+        self._sum += bucket[3]
+        self._count += bucket[4]
+        while self._min_queue and self._min_queue[-1][1] >= bucket[1]:
+            self._min_queue.pop()
+        self._min_queue.append(bucket)
+        while self._max_queue and self._max_queue[-1][2] <= bucket[2]:
+            self._max_queue.pop()
+        self._max_queue.append(bucket)
+
+    def _expire(self, now: float):
+        horizon = now - self.window
+        while self._buckets and self._buckets[0][0] + self.resolution <= horizon:
+            bucket = self._buckets.popleft()
+            self._sum -= bucket[3]
+            self._count -= bucket[4]
+            if self._min_queue and self._min_queue[0] is bucket:
+                self._min_queue.popleft()
+            if self._max_queue and self._max_queue[0] is bucket:
+                self._max_queue.popleft()
+        if self._open is not None and self._open[0] + self.resolution <= horizon:
+            self._open = None
+
+    def summary(self, now: float) -> Optional[Tuple[float, float, float]]:
+        """返回窗口内的 (最小值, 最大值, 平均值)，没有数据时返回 None。"""
+        self._expire(now)
+        count, total = self._count, self._sum
+        lo = self._min_queue[0][1] if self._min_queue else None
+        hi = self._max_queue[0][2] if self._max_queue else None
+        if self._open is not None:
+            count += self._open[4]
+            total += self._open[3]
+            lo = self._open[1] if lo is None else min(lo, self._open[1])
+            hi = self._open[2] if hi is None else max(hi, self._open[2])
+        if count == 0:
+            return None
+        return lo, hi, total / count
+
+    def checkpoint(self) -> List[List[float]]:
+        buckets = list(self._buckets)
+        if self._open is not None:
+            buckets.append(self._open)
+        return [[round(b[0]), round(b[1], 2), round(b[2], 2), round(b[3], 2), b[4]] for b in buckets]
+
+    def restore(self, buckets: List[List[float]], now: float):
+        for bucket in buckets:
+            if len(bucket) == 5 and bucket[4] > 0:
+                self._push([float(bucket[0]), bucket[1], bucket[2], bucket[3], int(bucket[4])])
+        self._expire(now)
+
+
+class EnergyMeter:
+    """按梯形法对功率采样做时间积分，按本地日期累计电量（kWh）。
+
+    相邻两次采样间隔超过 ``max_gap`` 秒（例如插件停止期间）时不积分，避免用一个读数推算整段空白。
+    """
+
+    def __init__(self, max_gap: float = 300.0):
+        self.max_gap = max_gap
+        self.daily_kwh: Dict[str, float] = {}
+        self._last: Optional[Tuple[float, float]] = None
+
+    @property
+    def last_ts(self) -> Optional[float]:
+        return self._last[0] if self._last else None
+
+    def add(self, ts: float, watts: float):
+        if watts < 0:
+            return
+        if self._last is not None:
+            last_ts, last_watts = self._last
+            elapsed = ts - last_ts
+            if elapsed <= 0:
+                return
+            if elapsed <= self.max_gap:
+                self._accumulate(last_ts, ts, (last_watts + watts) / 2)
+        self._last = (ts, watts)
+
+    def _accumulate(self, start: float, end: float, watts: float):
+        # 跨过午夜的区间按时间比例拆分到两天
+        while start < end:
+            day = datetime.datetime.fromtimestamp(start).date()
+            midnight = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+            stop = min(end, midnight)
+            key = day.isoformat()
+            self.daily_kwh[key] = self.daily_kwh.get(key, 0.0) + watts * (stop - start) / 3_600_000
+            start = stop
+        self._prune(datetime.date.fromtimestamp(end))
+
+    def _prune(self, today: datetime.date):
+        oldest = (today - datetime.timedelta(days=ENERGY_KEEP_DAYS)).isoformat()
+        for key in [k for k in self.daily_kwh if k < oldest]:
+            del self.daily_kwh[key]
+
+    def totals(self, now: float) -> Dict[str, float]:
+        """返回今日、本周（周一起）与本月的累计电量。"""
+        today = datetime.date.fromtimestamp(now)
+        week_start = (today - datetime.timedelta(days=today.weekday())).isoformat()
+        month_start = today.replace(day=1).isoformat()
+        today_key = today.isoformat()
+        totals = {'day': 0.0, 'week': 0.0, 'month': 0.0}
+        for key, kwh in self.daily_kwh.items():
+            if key > today_key:
+                continue
+            if key == today_key:
+                totals['day'] += kwh
+            if key >= week_start:
+                totals['week'] += kwh
+            if key >= month_start:
+                totals['month'] += kwh
+        return totals
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {
+            'days': {k: round(v, 6) for k, v in self.daily_kwh.items()},
+            'last': [round(self._last[0], 1), self._last[1]] if self._last else None,
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        self.daily_kwh.update({k: float(v) for k, v in state.get('days', {}).items()})
+        last = state.get('last')
+        if last and len(last) == 2:
+            self._last = (float(last[0]), float(last[1]))
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)